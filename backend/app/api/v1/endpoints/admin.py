@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any
+from app.services.response_cache import response_cache
+from app.services.rate_limiter import rate_limiters
+from app.services.resilience import circuit_breakers
+from app.core.tracing import tracer, trace_id_for
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/chatgpt-cache", response_model=Dict[str, Any])
+async def get_chatgpt_cache_stats():
+    """Hit/miss counts and tokens saved by the ChatGPT response cache"""
+    return response_cache.stats()
+
+@router.delete("/chatgpt-cache")
+async def clear_chatgpt_cache():
+    try:
+        await response_cache.clear()
+        logger.info("Cleared ChatGPT response cache")
+        return {"message": "ChatGPT response cache cleared"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to clear ChatGPT response cache: {str(e)}")
+
+@router.get("/rate-limits", response_model=Dict[str, Any])
+async def get_rate_limits():
+    """Current rate limiter and adaptive concurrency state per provider credential"""
+    return rate_limiters.stats()
+
+@router.get("/circuit-breakers", response_model=Dict[str, Any])
+async def get_circuit_breakers():
+    """State of the circuit breaker guarding each outbound endpoint"""
+    return circuit_breakers.stats()
+
+@router.get("/traces/{execution_id}", response_model=Dict[str, Any])
+async def get_execution_trace(execution_id: str, format: str = "tree"):
+    """Spans recorded for a recent execution, as a tree or as OTLP/JSON (?format=otlp)"""
+    spans = tracer.get_spans(execution_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="No trace recorded for this execution")
+    if format == "otlp":
+        return tracer.to_otlp(spans)
+    return {
+        "execution_id": execution_id,
+        "trace_id": trace_id_for(execution_id),
+        "spans": tracer.get_tree(execution_id)
+    }
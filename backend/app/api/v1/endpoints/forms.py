@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Body
 from typing import List, Dict, Any
 from app.schemas.form import Form, FormSubmission
-from app.db.supabase import supabase_client
+from app.db.repository import forms_repository, workflows_repository
 from uuid import UUID, uuid4
 from datetime import datetime
 import logging
@@ -11,8 +11,7 @@ router = APIRouter()
 @router.get("/", response_model=List[Form])
 async def get_all_forms():
     try:
-        response = supabase_client.table('forms').select("*").execute()
-        return response.data
+        return await forms_repository.find()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -26,16 +25,12 @@ async def get_form(form_id: str):
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid form ID format")
 
-        response = supabase_client.table('forms')\
-            .select('*')\
-            .eq('id', form_id)\
-            .single()\
-            .execute()
+        form = await forms_repository.get(form_id)
             
-        if not response.data:
+        if not form:
             raise HTTPException(status_code=404, detail="Form not found")
             
-        return response.data
+        return form
         
     except HTTPException as e:
         raise e
@@ -52,8 +47,8 @@ async def submit_form(form_id: UUID, form_data: Dict[str, Any] = Body(...)):
         print(f"Received form submission - form_id: {form_id}, data: {form_data}")
         
         # First, verify that the form exists
-        form_response = supabase_client.table('forms').select("*").eq('id', str(form_id)).single().execute()
-        if not form_response.data:
+        form = await forms_repository.get(str(form_id))
+        if not form:
             raise HTTPException(status_code=404, detail="Form not found")
         
         # Create submission data with all required fields
@@ -82,16 +77,14 @@ async def submit_form(form_id: UUID, form_data: Dict[str, Any] = Body(...)):
 async def get_form_workflows(form_id: str):
     try:
         # Get all workflows that have this form as a trigger
-        response = supabase_client.table('workflows')\
-            .select('*')\
-            .execute()
+        workflows = await workflows_repository.find()
             
-        if not response.data:
+        if not workflows:
             return []
             
         # Filter workflows to find ones that use this form
         form_workflows = []
-        for workflow in response.data:
+        for workflow in workflows:
             nodes = workflow.get('nodes', [])
             for node in nodes:
                 if (node.get('type') == 'form' and 
@@ -1,40 +1,104 @@
 from fastapi import APIRouter, HTTPException, Body
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from app.schemas.rule import Rule, RuleCreate
-from app.db.supabase import supabase_client
+from app.db.repository import rules_repository
 from pydantic import BaseModel
+import asyncio
 import openai
 from datetime import datetime
 import logging
 from app.core.config import settings
+from app.services.openai_client import get_openai_client
+from app.services.form_cache import form_schema_cache
+from app.services.rate_limiter import rate_limiters
+from app.services.resilience import call_with_resilience
+from app.core.cache import TTLCache
 
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 openai.api_key = settings.OPENAI_API_KEY
 
+# (prompt, field type) -> (JavaScript, Python) code generated for it
+_generated_code = TTLCache(
+    max_size=settings.RULE_GENERATION_CACHE_SIZE,
+    ttl=settings.RULE_GENERATION_CACHE_TTL_SECONDS
+)
+
 
 class PromptRequest(BaseModel):
     prompt: str
     fieldId: str
     formId: str
 
+async def _generate_validation_code(prompt: str, field_type: str) -> Tuple[str, str]:
+    """Generate the JavaScript and Python validation code for a prompt"""
+    # Customize system message based on field type
+    if field_type in ['checkbox', 'multiple-choice']:
+        system_message = (
+            "You are a form validation expert. Generate a JavaScript validation function that validates "
+            f"{'multiple selections' if field_type == 'checkbox' else 'single selection'} for a {field_type} field. "
+            "The function should follow this format:\n"
+            "```javascript\n"
+            "function validateField(value) {\n"
+            "    // For checkbox, value will be comma-separated string of selections\n"
+            "    // For radio/multiple-choice, value will be a single selection\n"
+            "    // Return true if valid, false if invalid\n"
+            "}\n"
+            "```\n"
+            "Return only the code without explanations."
+        )
+    else:
+        system_message = (
+            "You are a form validation expert. Generate a JavaScript validation function "
+            "that validates user input. The function should follow this format:\n"
+            "```javascript\n"
+            "function validateField(value) {\n"
+            "    // Validation logic here\n"
+            "    // Return true if valid, false if invalid\n"
+            "}\n"
+            "```\n"
+            "Return only the code without explanations."
+        )
+
+    client = get_openai_client(settings.OPENAI_API_KEY)
+
+    async def complete(messages: List[Dict[str, str]]):
+        async def create():
+            async with rate_limiters.limit("openai", settings.OPENAI_API_KEY):
+                return await client.chat.completions.create(model="gpt-3.5-turbo", messages=messages)
+        return await call_with_resilience("openai:chat.completions", create, idempotent=True)
+
+    # The two completions are independent, so request them together
+    js_response, py_response = await asyncio.gather(
+        complete([
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ]),
+        complete([
+            {
+                "role": "system",
+                "content": "You are a Python validation expert. Generate Python validation code based on the prompt."
+            },
+            {"role": "user", "content": prompt}
+        ])
+    )
+
+    # Extract and clean generated code
+    generated_code = js_response.choices[0].message.content.strip()
+    python_code = py_response.choices[0].message.content.strip()
+    return generated_code, python_code
+
 @router.post("/generate", response_model=Dict[str, Any])
 async def generate_rule(request: PromptRequest):
     try:
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        
         # Get specific form by ID
-        form_response = supabase_client.table("forms")\
-            .select("form_data")\
-            .eq("id", request.formId)\
-            .execute()
+        fields = await form_schema_cache.get_fields(request.formId)
 
-        if not form_response.data:
+        if fields is None:
             raise HTTPException(status_code=404, detail="Form not found")
             
-        form_data = form_response.data[0]["form_data"]
-        field = next((f for f in form_data if f["id"] == request.fieldId), None)
+        field = fields.get(request.fieldId)
         
         if not field:
             raise HTTPException(status_code=404, detail="Field not found")
@@ -43,58 +107,13 @@ async def generate_rule(request: PromptRequest):
         print("field_type:", field_type)
 
         field_type = field["type"] if field else "text"
-        
-        # Customize system message based on field type
-        if field_type in ['checkbox', 'multiple-choice']:
-            system_message = (
-                "You are a form validation expert. Generate a JavaScript validation function that validates "
-                f"{'multiple selections' if field_type == 'checkbox' else 'single selection'} for a {field_type} field. "
-                "The function should follow this format:\n"
-                "```javascript\n"
-                "function validateField(value) {\n"
-                "    // For checkbox, value will be comma-separated string of selections\n"
-                "    // For radio/multiple-choice, value will be a single selection\n"
-                "    // Return true if valid, false if invalid\n"
-                "}\n"
-                "```\n"
-                "Return only the code without explanations."
-            )
-        else:
-            system_message = (
-                "You are a form validation expert. Generate a JavaScript validation function "
-                "that validates user input. The function should follow this format:\n"
-                "```javascript\n"
-                "function validateField(value) {\n"
-                "    // Validation logic here\n"
-                "    // Return true if valid, false if invalid\n"
-                "}\n"
-                "```\n"
-                "Return only the code without explanations."
-            )
-
-        # Log OpenAI request
-        js_response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": request.prompt}
-            ]
-        )
-
-        py_response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a Python validation expert. Generate Python validation code based on the prompt."
-                },
-                {"role": "user", "content": request.prompt}
-            ]
-        )
 
-        # Extract and clean generated code
-        generated_code = js_response.choices[0].message.content.strip()
-        python_code = py_response.choices[0].message.content.strip()
+        cached_code = _generated_code.get((request.prompt, field_type))
+        if cached_code is not None:
+            generated_code, python_code = cached_code
+        else:
+            generated_code, python_code = await _generate_validation_code(request.prompt, field_type)
+            _generated_code.set((request.prompt, field_type), (generated_code, python_code))
         
         rule_data = {
             "name": f"Rule {datetime.now().strftime('%Y%m%d_%H%M%S')}",
@@ -107,14 +126,16 @@ async def generate_rule(request: PromptRequest):
             "created_at": datetime.now().isoformat(),
         }
 
-        response = supabase_client.table("rules").insert(rule_data).execute()
+        saved_rules = await rules_repository.insert(rule_data)
 
-        if response.data:
-            saved_rule = response.data[0]
+        if saved_rules:
+            saved_rule = saved_rules[0]
             return {"message": "Rule generated and saved successfully", "rule": saved_rule}
         else:
             raise HTTPException(status_code=500, detail="Failed to save the rule")
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -122,11 +143,8 @@ async def generate_rule(request: PromptRequest):
 async def get_rules():
     try:
         logger.info("Fetching rules from database")
-        # Use supabase_client instead of supabase
-        response = supabase_client.table("rules").select("*").order("created_at", desc=True).execute()
-
         # Ensure `rules` is always an array
-        rules = response.data if response.data else []
+        rules = await rules_repository.find(order_by="created_at", desc=True)
         
         return {
             "message": "Rules fetched successfully" if rules else "No rules found",
@@ -143,12 +161,12 @@ async def get_rule(rule_id: int):
     Get a specific rule by ID
     """
     try:
-        response = supabase_client.table('rules').select("*").eq('id', rule_id).single().execute()
+        rule = await rules_repository.get(rule_id)
         
-        if not response.data:
+        if not rule:
             raise HTTPException(status_code=404, detail="Rule not found")
             
-        return response.data
+        return rule
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -159,10 +177,10 @@ async def get_rule(rule_id: int):
 async def delete_rule(rule_id: str):
     try:
         # Attempt to delete the rule from the Supabase table
-        response = supabase_client.table("rules").delete().eq("id", rule_id).execute()
+        deleted_rules = await rules_repository.delete(rule_id)
 
-        if response.data:
-            return {"message": "Rule deleted successfully", "deleted_rule": response.data}
+        if deleted_rules:
+            return {"message": "Rule deleted successfully", "deleted_rule": deleted_rules}
         else:
             raise HTTPException(status_code=404, detail="Rule not found")
     except Exception as e:
@@ -1,11 +1,26 @@
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Body, Query, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from uuid import uuid4
-from app.db.supabase import supabase_client
+from app.db.repository import (
+    forms_repository,
+    workflows_repository,
+    workflow_executions_repository,
+    action_configurations_repository
+)
 from app.services.workflow_executor import WorkflowExecutor
-from app.schemas.workflow import WorkflowCreate, WorkflowResponse, WorkflowExecution, ActionConfig, ExecutionStatus
+from app.services.workflow_cache import workflow_cache
+from app.services.form_cache import form_schema_cache
+from app.services.execution_queue import execution_queue
+from app.services.idempotency import idempotency_store, trigger_fingerprint, IdempotencyConflict
+from app.core.config import settings
+from app.core.log import Truncated
+from app.services.math_batch import evaluate_math_batch
+from app.schemas.workflow import WorkflowCreate, WorkflowResponse, WorkflowExecution, ActionConfig, ExecutionStatus, MathBatchRequest
+import asyncio
 import logging
 
 # Configure logging
@@ -50,16 +65,11 @@ async def create_workflow(workflow: WorkflowCreate):
             raise HTTPException(status_code=400, detail="Form ID not found in form node")
 
         # Get existing form data
-        form_response = supabase_client.table('forms')\
-            .select('*')\
-            .eq('id', form_id)\
-            .single()\
-            .execute()
+        form_data = await forms_repository.get(form_id)
         
-        if not form_response.data:
+        if not form_data:
             raise HTTPException(status_code=404, detail="Form not found")
 
-        form_data = form_response.data
         existing_fields = form_data.get('form_data', [])
 
         # Find all Math Function nodes and their output variables
@@ -97,17 +107,16 @@ async def create_workflow(workflow: WorkflowCreate):
             }
 
             # Update the form with new fields
-            update_response = supabase_client.table('forms')\
-                .update(updated_form_data)\
-                .eq('id', form_id)\
-                .execute()
+            updated_forms = await forms_repository.update(form_id, updated_form_data)
 
-            if not update_response.data:
+            if not updated_forms:
                 raise HTTPException(
                     status_code=500,
                     detail="Failed to update form with math output fields"
                 )
 
+            form_schema_cache.invalidate(form_id)
+
         # Create the workflow with proper data structure
         workflow_data = {
             "id": str(uuid4()),
@@ -119,14 +128,12 @@ async def create_workflow(workflow: WorkflowCreate):
             "updated_at": datetime.utcnow().isoformat()
         }
 
-        response = supabase_client.table('workflows')\
-            .insert(workflow_data)\
-            .execute()
+        created = await workflows_repository.insert(workflow_data)
 
-        if not response.data:
+        if not created:
             raise HTTPException(status_code=500, detail="Failed to create workflow")
 
-        return response.data[0]
+        return created[0]
 
     except Exception as e:
         print(f"Error creating workflow: {str(e)}")  # Add logging
@@ -135,12 +142,7 @@ async def create_workflow(workflow: WorkflowCreate):
 @router.get("/", response_model=List[WorkflowResponse])
 async def get_workflows():
     try:
-        response = supabase_client.table('workflows').select("*").order('created_at.desc').execute()
-        
-        if not response.data:
-            return []
-            
-        return response.data
+        return await workflows_repository.find(order_by='created_at', desc=True)
         
     except Exception as e:
         raise HTTPException(
@@ -151,12 +153,12 @@ async def get_workflows():
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
 async def get_workflow(workflow_id: str):
     try:
-        response = supabase_client.table('workflows').select("*").eq('id', workflow_id).single().execute()
+        workflow = await workflows_repository.get(workflow_id)
         
-        if not response.data:
+        if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
             
-        return response.data
+        return workflow
         
     except Exception as e:
         raise HTTPException(
@@ -174,12 +176,15 @@ async def update_workflow(workflow_id: str, workflow: WorkflowCreate):
             "updated_at": datetime.utcnow().isoformat()
         }
         
-        response = supabase_client.table('workflows').update(workflow_data).eq('id', workflow_id).execute()
+        updated = await workflows_repository.update(workflow_id, workflow_data)
         
-        if not response.data:
+        if not updated:
             raise HTTPException(status_code=404, detail="Workflow not found")
+
+        # Nodes and edges changed, so the cached definition and plan are stale
+        workflow_cache.invalidate(workflow_id)
             
-        return response.data[0]
+        return updated[0]
         
     except Exception as e:
         raise HTTPException(
@@ -191,22 +196,25 @@ async def update_workflow(workflow_id: str, workflow: WorkflowCreate):
 async def toggle_workflow_status(workflow_id: str):
     try:
         # First get the current status
-        current = supabase_client.table('workflows').select("is_active").eq('id', workflow_id).single().execute()
-        if not current.data:
+        current = await workflows_repository.get(workflow_id, columns="is_active")
+        if not current:
             raise HTTPException(status_code=404, detail="Workflow not found")
             
         # Toggle the status
-        new_status = not current.data['is_active']
-        response = supabase_client.table('workflows').update({
+        new_status = not current['is_active']
+        updated = await workflows_repository.update(workflow_id, {
             "is_active": new_status,
             "updated_at": datetime.utcnow().isoformat()
-        }).eq('id', workflow_id).execute()
+        })
         
-        if not response.data:
+        if not updated:
             raise HTTPException(status_code=404, detail="Workflow not found")
-            
-        return response.data[0]
-        
+
+        # Cached copies would still report the old is_active flag
+        workflow_cache.invalidate(workflow_id)
+
+        return updated[0]
+
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -214,23 +222,22 @@ async def toggle_workflow_status(workflow_id: str):
         )
 
 @router.post("/{workflow_id}/execute")
-async def execute_workflow(workflow_id: str, trigger_data: Dict[str, Any]):
+async def execute_workflow(
+    workflow_id: str,
+    trigger_data: Dict[str, Any],
+    wait: bool = Query(True, description="Run inline and return the result; false queues the execution and returns 202"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     try:
         logger.info(f"\n=== Starting Workflow Execution API ===")
         logger.info(f"Workflow ID: {workflow_id}")
-        logger.info(f"Trigger Data: {trigger_data}")
-
-        # Get workflow - remove await since supabase_client is synchronous
-        workflow_response = supabase_client.table("workflows")\
-            .select("*")\
-            .eq("id", workflow_id)\
-            .single()\
-            .execute()
+        logger.info("Trigger Data: %s", Truncated(trigger_data))
+
+        workflow = await workflow_cache.get(workflow_id)
             
-        if not workflow_response.data:
+        if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
             
-        workflow = workflow_response.data
         
         # Check if workflow is active
         if not workflow.get('is_active', False):
@@ -240,52 +247,104 @@ async def execute_workflow(workflow_id: str, trigger_data: Dict[str, Any]):
                 detail="Cannot execute inactive workflow. Please activate the workflow first."
             )
 
-        # Create workflow execution record - remove await
-        execution_data = {
-            "id": str(uuid4()),
-            "workflow_id": workflow_id,
-            "workflow_version": workflow.get("version", 1),
-            "status": ExecutionStatus.PENDING,
-            "trigger_type": "form_submission",
-            "trigger_data": trigger_data,
-            "started_at": datetime.utcnow().isoformat()
-        }
-
-        logger.info("Creating workflow execution record")
-        execution_response = supabase_client.table("workflow_executions")\
-            .insert(execution_data)\
-            .execute()
+        # Retried requests carry the same Idempotency-Key; without one, identical
+        # payloads inside the workflow's dedup window count as duplicate triggers
+        key, ttl = None, None
+        if idempotency_key:
+            key, ttl = f"key:{workflow_id}:{idempotency_key}", settings.IDEMPOTENCY_TTL_SECONDS
+        else:
+            dedup_window = workflow.get("dedup_window_seconds") or settings.TRIGGER_DEDUP_WINDOW_SECONDS
+            if dedup_window > 0:
+                key, ttl = trigger_fingerprint(workflow_id, trigger_data), dedup_window
+
+        if key is None:
+            status_code, content, _ = await _run_execution(workflow_id, workflow, trigger_data, wait)
+            return JSONResponse(status_code=status_code, content=jsonable_encoder(content))
+
+        try:
+            original = await idempotency_store.begin(key, workflow_id, ttl)
+        except IdempotencyConflict:
+            raise HTTPException(status_code=409, detail="A request with this idempotency key is still in progress")
+
+        if original is not None:
+            logger.info("Replaying execution %s for duplicate request", original['execution_id'])
+            return JSONResponse(
+                status_code=original["status_code"],
+                content=original["response"],
+                headers={"Idempotent-Replayed": "true"}
+            )
 
-        if not execution_response.data:
-            raise HTTPException(status_code=500, detail="Failed to create workflow execution")
+        try:
+            status_code, content, execution_id = await _run_execution(workflow_id, workflow, trigger_data, wait)
+        except BaseException as e:
+            await idempotency_store.abandon(key, e)
+            raise
 
-        # Execute workflow
-        executor = WorkflowExecutor(execution_response.data[0])
-        logger.info("Starting workflow execution")
-        
-        result = await executor.execute_workflow(
-            nodes=workflow["nodes"],
-            edges=workflow["edges"],
-            trigger_data=trigger_data
-        )
-        
-        logger.info(f"Workflow execution completed: {result}")
-        return result
+        content = jsonable_encoder(content)
+        await idempotency_store.complete(key, execution_id, status_code, content, ttl)
+        return JSONResponse(status_code=status_code, content=content)
 
+    except HTTPException as e:
+        raise e
     except Exception as e:
         logger.error(f"Workflow execution failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _run_execution(workflow_id: str, workflow: Dict[str, Any], trigger_data: Dict[str, Any], wait: bool):
+    """Create the execution record and run or queue it; returns (status code, body, execution id)"""
+    # Create workflow execution record
+    execution_data = {
+        "id": str(uuid4()),
+        "workflow_id": workflow_id,
+        "workflow_version": workflow.get("version", 1),
+        # Only queued executions are PENDING, so queue workers never claim an inline run
+        "status": ExecutionStatus.RUNNING if wait else ExecutionStatus.PENDING,
+        "trigger_type": "form_submission",
+        "trigger_data": trigger_data,
+        "started_at": datetime.utcnow().isoformat()
+    }
+
+    logger.info("Creating workflow execution record")
+    created_executions = await workflow_executions_repository.insert(execution_data)
+
+    if not created_executions:
+        raise HTTPException(status_code=500, detail="Failed to create workflow execution")
+
+    if not wait:
+        try:
+            execution_queue.enqueue(created_executions[0], workflow)
+        except asyncio.QueueFull:
+            await workflow_executions_repository.update(execution_data["id"], {
+                "status": ExecutionStatus.FAILED,
+                "error_message": "Execution queue is full",
+                "completed_at": datetime.utcnow().isoformat()
+            })
+            raise HTTPException(status_code=503, detail="Execution queue is full, try again later")
+
+        logger.info("Queued workflow execution %s", execution_data['id'])
+        return 202, {
+            "execution_id": execution_data["id"],
+            "status": ExecutionStatus.PENDING.value,
+            "status_url": f"/api/v1/workflows/{workflow_id}/executions/{execution_data['id']}"
+        }, execution_data["id"]
+
+    # Execute workflow
+    executor = WorkflowExecutor(created_executions[0])
+    logger.info("Starting workflow execution")
+    
+    result = await executor.run(workflow)
+    
+    logger.info("Workflow execution completed: %s", Truncated(result))
+    return 200, result, execution_data["id"]
+
 @router.get("/{workflow_id}/executions", response_model=List[WorkflowExecution])
 async def get_workflow_executions(workflow_id: str):
     try:
-        response = supabase_client.table('workflow_executions')\
-            .select('*')\
-            .eq('workflow_id', workflow_id)\
-            .order('started_at', desc=True)\
-            .execute()
-            
-        return response.data
+        return await workflow_executions_repository.find(
+            order_by='started_at',
+            desc=True,
+            workflow_id=workflow_id
+        )
         
     except Exception as e:
         raise HTTPException(
@@ -293,6 +352,66 @@ async def get_workflow_executions(workflow_id: str):
             detail=f"Failed to fetch workflow executions: {str(e)}"
         )
 
+@router.get("/{workflow_id}/executions/{execution_id}")
+async def get_workflow_execution(
+    workflow_id: str,
+    execution_id: str,
+    wait: float = Query(0, ge=0, le=60, description="Seconds to wait for a queued execution to finish")
+):
+    """Execution status; with ``wait`` this long-polls until the run finishes or the wait runs out"""
+    try:
+        executions = await workflow_executions_repository.find(id=execution_id, workflow_id=workflow_id)
+        if not executions:
+            raise HTTPException(status_code=404, detail="Workflow execution not found")
+        execution = executions[0]
+
+        unfinished = (ExecutionStatus.PENDING.value, ExecutionStatus.RUNNING.value)
+        if wait and execution.get("status") in unfinished:
+            if await execution_queue.wait(execution_id, wait) is not None:
+                execution = await workflow_executions_repository.get(execution_id)
+
+        # Node results are only held in memory by the process that ran the execution
+        result = execution_queue.get_result(execution_id)
+        if result is not None:
+            execution = {**execution, "result": result}
+        return execution
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch workflow execution: {str(e)}"
+        )
+
+@router.post("/{workflow_id}/nodes/{node_id}/math/batch")
+async def evaluate_math_node_batch(workflow_id: str, node_id: str, batch: MathBatchRequest):
+    """Evaluate a math node over a column-oriented batch of submissions (replays, bulk imports)"""
+    try:
+        plan = await workflow_cache.get_plan(workflow_id)
+        if not plan:
+            raise HTTPException(status_code=404, detail="Workflow not found")
+
+        node = plan.get_node(node_id)
+        if not node or node.get("data", {}).get("app", {}).get("id") != "math":
+            raise HTTPException(status_code=404, detail="Math node not found")
+
+        config = node.get("data", {}).get("config", {}).get("mathConfig", {})
+        if not config:
+            raise HTTPException(status_code=400, detail="Math configuration not found")
+
+        return evaluate_math_batch(config, batch.columns)
+
+    except HTTPException as e:
+        raise e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to evaluate math batch: {str(e)}"
+        )
+
 async def start_workflow_execution(execution_data: Dict[str, Any]):
     executor = WorkflowExecutor(execution_data)
     await executor.start()
@@ -313,14 +432,12 @@ async def create_action_config(
         }
         
         # First try to update existing config
-        response = supabase_client.table('action_configurations')\
-            .upsert(action_config_data)\
-            .execute()
+        saved = await action_configurations_repository.upsert(action_config_data)
             
-        if not response.data:
+        if not saved:
             raise HTTPException(status_code=500, detail="Failed to create/update action configuration")
             
-        return response.data[0]
+        return saved[0]
         
     except Exception as e:
         raise HTTPException(
@@ -332,20 +449,15 @@ async def create_action_config(
 async def delete_workflow(workflow_id: str):
     try:
         # First check if workflow exists
-        workflow = supabase_client.table('workflows')\
-            .select('*')\
-            .eq('id', workflow_id)\
-            .single()\
-            .execute()
+        workflow = await workflows_repository.get(workflow_id)
             
-        if not workflow.data:
+        if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
             
         # Delete workflow
-        response = supabase_client.table('workflows')\
-            .delete()\
-            .eq('id', workflow_id)\
-            .execute()
+        await workflows_repository.delete(workflow_id)
+
+        workflow_cache.invalidate(workflow_id)
             
         return {"message": "Workflow deleted successfully"}
         
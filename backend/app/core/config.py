@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Rules Engine API"
@@ -15,12 +15,99 @@ class Settings(BaseSettings):
     # Database settings
     DB_HOST: Optional[str] = None
     DB_PASSWORD: Optional[str] = None
+    DB_MAX_WORKERS: int = 16  # Threads available for blocking supabase calls
+    DATABASE_URL: Optional[str] = None  # Direct Postgres DSN, required by the postgres execution queue
 
     # Email settings are now optional since we use dynamic config
     EMAIL_HOST: Optional[str] = None
     EMAIL_USER: Optional[str] = None
     EMAIL_PASSWORD: Optional[str] = None
     EMAIL_PORT: Optional[int] = None
+
+    # Logging
+    LOG_LEVEL: str = "INFO"  # Root level; records are written by a background listener thread
+    EXECUTOR_LOG_LEVEL: str = "INFO"  # Default level for workflow executions
+    WORKFLOW_LOG_LEVELS: Dict[str, str] = {}  # Per workflow id overrides, e.g. {"<id>": "DEBUG"}
+    LOG_SAMPLE_RATE: float = 0.0  # Share of executions logged at DEBUG with node payloads
+    LOG_PAYLOAD_MAX_CHARS: int = 500  # Longest rendering of a payload in one log record
+    TRACE_MAX_EVENTS: int = 1000  # Debug trace events kept per execution, stored with it
+
+    # Execution tracing spans, served by GET /api/v1/admin/traces/{execution_id}
+    TRACING_ENABLED: bool = True
+    TRACING_MAX_TRACES: int = 500  # Executions whose spans are kept in memory
+    TRACING_MAX_SPANS_PER_TRACE: int = 2000
+    TRACING_EXPORT: str = "none"  # "none", "stdout" or "file"; OTLP/JSON, one trace per line
+    TRACING_EXPORT_PATH: str = "traces.jsonl"  # Used when TRACING_EXPORT is "file"
+
+    # Workflow execution settings
+    WORKFLOW_EXECUTION_MODE: str = "sequential"  # "sequential" or "concurrent"
+    WORKFLOW_MAX_CONCURRENCY: int = 4  # Max nodes in flight per execution in concurrent mode
+    WORKFLOW_CACHE_SIZE: int = 256  # Workflow definitions (and compiled plans) kept in memory
+    WORKFLOW_CACHE_TTL_SECONDS: float = 300.0  # Max age before a cached definition is refetched
+    JOURNAL_MAX_BATCH: int = 50  # Buffered node execution rows before a bulk flush
+    JOURNAL_FLUSH_INTERVAL_SECONDS: float = 5.0  # Max age of buffered node execution rows
+    EXECUTION_QUEUE_WORKERS: int = 4  # Background tasks draining enqueued executions
+    EXECUTION_QUEUE_MAX_SIZE: int = 1000  # Pending executions before enqueue is refused
+    EXECUTION_RESULT_TTL_SECONDS: float = 600.0  # How long finished results stay pollable
+    EXECUTION_QUEUE_BACKEND: str = "memory"  # "memory" (this process only) or "postgres" (shared, durable)
+    EXECUTION_LEASE_SECONDS: float = 60.0  # A claimed execution is reclaimable once its lease runs out
+    EXECUTION_HEARTBEAT_SECONDS: float = 15.0  # How often a worker renews the lease it holds
+    EXECUTION_POLL_INTERVAL_SECONDS: float = 1.0  # Idle workers look for new PENDING rows this often
+    EXECUTION_MAX_ATTEMPTS: int = 3  # Claims of one execution before it is marked failed
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0  # How long an Idempotency-Key maps to its execution
+    IDEMPOTENCY_PENDING_SECONDS: float = 300.0  # Claim lease of a running request; a crashed one frees its key after this
+    TRIGGER_DEDUP_WINDOW_SECONDS: float = 0.0  # Identical trigger_data within this window is a duplicate; 0 disables
+
+    # Outbound HTTP settings (Slack, SMS and other provider calls)
+    HTTP_TIMEOUT_SECONDS: float = 30.0  # Read/write/pool timeout per request
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    HTTP_MAX_CONNECTIONS_PER_PROVIDER: int = 20  # Open connections to one provider host
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10  # Idle connections kept for reuse
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_ENABLE_HTTP2: bool = True  # Only takes effect when the h2 package is installed
+    SMS_BULK_CHUNK_SIZE: int = 100  # Phone numbers per nettyfish SendSMS request
+    SMS_BULK_CONCURRENCY: int = 4  # Bulk SMS requests in flight at once
+
+    # Outbound rate limits per provider and credential ("slack", "sms", "smtp", "openai")
+    RATE_LIMIT_PER_SECOND: Dict[str, float] = {"slack": 1.0, "sms": 10.0, "smtp": 5.0, "openai": 5.0}  # 0 disables
+    RATE_LIMIT_BURST: Dict[str, int] = {"slack": 3, "sms": 20, "smtp": 10, "openai": 10}
+    PROVIDER_MAX_CONCURRENCY: Dict[str, int] = {"slack": 2, "sms": 8, "smtp": 4, "openai": 8}  # Ceiling for the adaptive limit
+
+    # Retries and circuit breakers for outbound calls
+    RETRY_MAX_ATTEMPTS: int = 3  # Attempts per call, including the first
+    RETRY_BASE_DELAY_SECONDS: float = 0.5  # Backoff ceiling doubles per attempt (full jitter)
+    RETRY_MAX_DELAY_SECONDS: float = 10.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # Consecutive transient failures before an endpoint's breaker opens
+    CIRCUIT_RECOVERY_SECONDS: float = 30.0  # Open breakers let a probe call through after this long
+
+    # Transactional outbox for email, SMS and Slack nodes (needs DATABASE_URL)
+    OUTBOX_ENABLED: bool = False  # Nodes record an outbox row instead of calling the provider inline
+    OUTBOX_BATCH_SIZE: int = 50  # Rows one dispatcher claims per round trip
+    OUTBOX_CONCURRENCY: Dict[str, int] = {"email": 4, "sms": 8, "slack": 2}  # Deliveries in flight per provider
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0  # Idle dispatchers look for new rows this often
+    OUTBOX_LEASE_SECONDS: float = 120.0  # A claimed row is redelivered if not finished within this long
+    OUTBOX_MAX_ATTEMPTS: int = 3  # Claims of one row before it is marked failed
+
+    # Pooled SMTP sessions, per (host, port, username)
+    SMTP_MAX_SESSIONS_PER_ACCOUNT: int = 4  # Concurrent sessions to one mail account
+    SMTP_IDLE_TIMEOUT_SECONDS: float = 60.0  # Idle sessions older than this are closed
+    SMTP_MAX_MESSAGES_PER_SESSION: int = 100  # Reconnect after this many sends
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+
+    # OpenAI clients, cached per API key
+    OPENAI_TIMEOUT_SECONDS: float = 120.0  # Completions can legitimately take a while
+    OPENAI_CLIENT_CACHE_SIZE: int = 64  # Distinct API keys kept with a ready client
+
+    # ChatGPT response cache, used by nodes with cacheResponses enabled
+    CHATGPT_CACHE_SIZE: int = 1024  # Responses kept in memory
+    CHATGPT_CACHE_TTL_SECONDS: float = 86400.0  # Default age limit; nodes may set cacheTtlSeconds
+    CHATGPT_CACHE_PATH: Optional[str] = None  # SQLite file for a persistent tier, disabled when unset
+
+    # Rule generation
+    FORM_CACHE_SIZE: int = 256  # Form schemas kept in memory
+    FORM_CACHE_TTL_SECONDS: float = 300.0
+    RULE_GENERATION_CACHE_SIZE: int = 512  # Generated (JavaScript, Python) pairs per (prompt, field type)
+    RULE_GENERATION_CACHE_TTL_SECONDS: float = 86400.0
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,121 @@
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+import logging
+import queue
+import random
+import reprlib
+from app.core.config import settings
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(context)s%(message)s'
+
+_listener: Optional[QueueListener] = None
+
+# Bounded repr: large dicts and lists are elided instead of rendered in full
+_payload_repr = reprlib.Repr()
+_payload_repr.maxlevel = 4
+_payload_repr.maxdict = 20
+_payload_repr.maxlist = 20
+_payload_repr.maxstring = 200
+_payload_repr.maxother = 200
+
+
+class ContextFormatter(logging.Formatter):
+    """Prefixes records from an ExecutionLogger with their workflow and execution ids"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        execution_id = getattr(record, "execution_id", None)
+        record.context = "" if execution_id is None else f"[workflow={record.workflow_id} execution={execution_id}] "
+        return super().format(record)
+
+
+def setup_logging() -> None:
+    """Send every record through a QueueHandler; a listener thread writes them out.
+
+    Callers only pay for building the record, the stream write and its lock
+    happen on the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(ContextFormatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(settings.LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class Truncated:
+    """Log argument rendered only if the record is emitted, cut to LOG_PAYLOAD_MAX_CHARS"""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else _payload_repr.repr(self.value)
+        limit = self.limit or settings.LOG_PAYLOAD_MAX_CHARS
+        if len(text) <= limit:
+            return text
+        return f"{text[:limit]}... ({len(text) - limit} more chars)"
+
+
+def _parse_level(level: Any) -> Optional[int]:
+    if isinstance(level, int):
+        return level
+    if isinstance(level, str):
+        value = logging.getLevelName(level.upper())
+        if isinstance(value, int):
+            return value
+    return None
+
+
+class ExecutionLogger(logging.LoggerAdapter):
+    """Logger for one workflow execution.
+
+    The level comes from WORKFLOW_LOG_LEVELS or the workflow's ``log_level``,
+    falling back to EXECUTOR_LOG_LEVEL. A LOG_SAMPLE_RATE share of executions
+    is logged at DEBUG in full, so payload detail is available without paying
+    for it on every execution. Records carry ``workflow_id`` and ``execution_id``.
+    """
+
+    def __init__(self, logger: logging.Logger, workflow_id: Optional[str], execution_id: Optional[str]):
+        super().__init__(logger, {"workflow_id": workflow_id, "execution_id": execution_id})
+        self.sampled = random.random() < settings.LOG_SAMPLE_RATE
+        self.level = logging.INFO
+        self.set_level(settings.WORKFLOW_LOG_LEVELS.get(workflow_id or ""))
+
+    def configure(self, workflow: dict) -> None:
+        """Apply the workflow's own ``log_level``; WORKFLOW_LOG_LEVELS still takes precedence"""
+        workflow_id = self.extra["workflow_id"] or ""
+        self.set_level(settings.WORKFLOW_LOG_LEVELS.get(workflow_id) or workflow.get("log_level"))
+
+    def set_level(self, level: Any) -> None:
+        resolved = _parse_level(level) or _parse_level(settings.EXECUTOR_LOG_LEVEL) or logging.INFO
+        self.level = logging.DEBUG if self.sampled else resolved
+
+    def isEnabledFor(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, msg: Any, *args: Any, **kwargs: Any) -> None:
+        if self.isEnabledFor(level):
+            msg, kwargs = self.process(msg, kwargs)
+            # Bypass the module logger's own level check; the per-execution level decides
+            self.logger._log(level, msg, args, **kwargs)
@@ -0,0 +1,259 @@
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def trace_id_for(execution_id: str) -> str:
+    """Executions are traced under their own id, so a trace is found without an index"""
+    try:
+        return UUID(str(execution_id)).hex
+    except ValueError:
+        return os.urandom(16).hex()
+
+
+class Span:
+    """A timed operation; entering it makes it the parent of spans started inside"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_span_id", "name", "attributes",
+        "start_ns", "end_ns", "status_code", "status_message", "_token", "_tracer"
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_span_id: Optional[str], attributes: Dict[str, Any]):
+        self._tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status_code = STATUS_UNSET
+        self.status_message: Optional[str] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: Any) -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = str(error)
+
+    def activate(self) -> "Span":
+        """Make this the current span until ``end``, for spans that do not fit a ``with`` block"""
+        self._token = _current_span.set(self)
+        return self
+
+    def __enter__(self) -> "Span":
+        return self.activate()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc is not None and self.status_code == STATUS_UNSET:
+            self.set_error(exc)
+        self.end()
+        return False
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.status_code == STATUS_UNSET:
+            self.status_code = STATUS_OK
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        self._tracer._finish(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status_code}
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    """Returned for child spans outside a trace; tracing only follows executions"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: Any) -> None:
+        pass
+
+    def activate(self) -> "_NoopSpan":
+        return self
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class _Exporter:
+    """Writes finished traces as OTLP/JSON lines from a background thread"""
+
+    def __init__(self, target: str, path: Optional[str]):
+        self.target = target
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        self._queue.put(payload)
+
+    def _run(self) -> None:
+        stream = open(self.path, "a", encoding="utf-8") if self.target == "file" else sys.stdout
+        while True:
+            payload = self._queue.get()
+            try:
+                stream.write(json.dumps(payload, default=str) + "\n")
+                stream.flush()
+            except Exception as e:
+                logger.error(f"Failed to export trace: {str(e)}")
+
+
+class Tracer:
+    """Keeps the spans of the last ``max_traces`` traces in memory.
+
+    A trace is started per workflow execution (``start_trace``); ``span``
+    creates children of the current span and is a no-op outside a trace, so
+    Supabase and provider calls made by API handlers are not recorded.
+    Finished traces are optionally exported (TRACING_EXPORT = "stdout" or "file").
+    """
+
+    def __init__(self, enabled: bool, max_traces: int, max_spans: int, export: str, export_path: Optional[str]):
+        self.enabled = enabled
+        self.max_traces = max_traces
+        self.max_spans = max_spans
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._exporter_target = export if export in ("stdout", "file") else None
+        self._export_path = export_path
+        self._exporter: Optional[_Exporter] = None
+
+    def start_trace(self, execution_id: str, name: str, **attributes: Any):
+        """Root span of an execution's trace; use as a context manager"""
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, trace_id_for(execution_id), None, attributes)
+
+    def span(self, name: str, **attributes: Any):
+        parent = _current_span.get()
+        if parent is None or not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    def get_spans(self, execution_id: str) -> List[Span]:
+        with self._lock:
+            return list(self._traces.get(trace_id_for(execution_id), []))
+
+    def get_tree(self, execution_id: str) -> List[Dict[str, Any]]:
+        """Finished spans of an execution nested under their parents"""
+        spans = sorted(self.get_spans(execution_id), key=lambda span: span.start_ns)
+        nodes = {
+            span.span_id: {
+                "name": span.name,
+                "span_id": span.span_id,
+                "start_time_unix_nano": span.start_ns,
+                "duration_ms": round(((span.end_ns or span.start_ns) - span.start_ns) / 1e6, 3),
+                "status": {STATUS_OK: "ok", STATUS_ERROR: "error"}.get(span.status_code, "unset"),
+                "status_message": span.status_message,
+                "attributes": span.attributes,
+                "children": []
+            }
+            for span in spans
+        }
+        roots = []
+        for span in spans:
+            parent = nodes.get(span.parent_span_id) if span.parent_span_id else None
+            (parent["children"] if parent else roots).append(nodes[span.span_id])
+        return roots
+
+    def to_otlp(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": settings.PROJECT_NAME}},
+                    {"key": "service.version", "value": {"stringValue": settings.VERSION}}
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "app.core.tracing"},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            if len(spans) < self.max_spans:
+                spans.append(span)
+            finished = list(spans) if span.parent_span_id is None else None
+
+        if finished is not None and self._exporter_target:
+            # The root span ends last; export the whole trace at once
+            if self._exporter is None:
+                self._exporter = _Exporter(self._exporter_target, self._export_path)
+            self._exporter.export(self.to_otlp(finished))
+
+
+tracer = Tracer(
+    enabled=settings.TRACING_ENABLED,
+    max_traces=settings.TRACING_MAX_TRACES,
+    max_spans=settings.TRACING_MAX_SPANS_PER_TRACE,
+    export=settings.TRACING_EXPORT,
+    export_path=settings.TRACING_EXPORT_PATH
+)
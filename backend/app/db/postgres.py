@@ -0,0 +1,16 @@
+from functools import lru_cache
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """Direct Postgres connection for work the supabase REST API cannot express (row locks)"""
+    if not settings.DATABASE_URL:
+        raise RuntimeError("DATABASE_URL must be set to use the Postgres execution queue or the outbox")
+    return create_engine(
+        settings.DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=settings.EXECUTION_QUEUE_WORKERS + 2
+    )
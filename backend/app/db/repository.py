@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Union
+import asyncio
+from app.core.config import settings
+from app.core.metrics import SUPABASE_QUERY_DURATION
+from app.core.tracing import tracer
+from app.db.supabase import supabase_client
+
+# supabase-py is synchronous, so every query runs on a bounded thread pool
+# instead of blocking the event loop for a full PostgREST round trip
+_db_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_MAX_WORKERS,
+    thread_name_prefix="supabase"
+)
+
+
+async def run_query(query: Any) -> Any:
+    """Execute a supabase query builder off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, query.execute)
+
+
+class TableRepository:
+    """Async access to a single supabase table"""
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+
+    def query(self):
+        """Start a new query builder for this table"""
+        return supabase_client.table(self.table_name)
+
+    async def execute(self, query: Any) -> Any:
+        with tracer.span("supabase.query", table=self.table_name):
+            with SUPABASE_QUERY_DURATION.time(table=self.table_name):
+                return await run_query(query)
+
+    async def get(self, record_id: Any, columns: str = "*") -> Optional[Dict[str, Any]]:
+        response = await self.execute(
+            self.query().select(columns).eq('id', record_id).single()
+        )
+        return response.data
+
+    async def find(
+        self,
+        columns: str = "*",
+        order_by: Optional[str] = None,
+        desc: bool = False,
+        **filters: Any
+    ) -> List[Dict[str, Any]]:
+        query = self.query().select(columns)
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        if order_by:
+            query = query.order(order_by, desc=desc)
+        response = await self.execute(query)
+        return response.data or []
+
+    async def insert(self, data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        response = await self.execute(self.query().insert(data))
+        return response.data or []
+
+    async def upsert(
+        self,
+        data: Union[Dict[str, Any], List[Dict[str, Any]]],
+        ignore_duplicates: bool = False
+    ) -> List[Dict[str, Any]]:
+        """With ignore_duplicates, existing rows are left alone and only new rows are returned"""
+        response = await self.execute(self.query().upsert(data, ignore_duplicates=ignore_duplicates))
+        return response.data or []
+
+    async def update(self, record_id: Any, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        response = await self.execute(self.query().update(data).eq('id', record_id))
+        return response.data or []
+
+    async def delete(self, record_id: Any) -> List[Dict[str, Any]]:
+        response = await self.execute(self.query().delete().eq('id', record_id))
+        return response.data or []
+
+
+forms_repository = TableRepository('forms')
+workflows_repository = TableRepository('workflows')
+workflow_executions_repository = TableRepository('workflow_executions')
+node_executions_repository = TableRepository('node_executions')
+rules_repository = TableRepository('rules')
+action_configurations_repository = TableRepository('action_configurations')
+execution_idempotency_repository = TableRepository('execution_idempotency')
+outbox_repository = TableRepository('outbox')
@@ -4,6 +4,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.dialects.postgresql import ARRAY
 import json
+import logging
 from datetime import datetime
 from typing import Dict, Any
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,20 +13,62 @@ import bcrypt
 from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.db.supabase import supabase_client  # Add this import
+from app.db.repository import forms_repository
+from app.services.execution_queue import execution_queue
+from app.core.http import http_clients
+from app.services.smtp_pool import smtp_pool
+from app.services.response_cache import response_cache
+from app.services.idempotency import idempotency_store
+from app.services.outbox import outbox_dispatcher
+from app.core.log import setup_logging, shutdown_logging
+from app.core.metrics import registry as metrics_registry, MetricsMiddleware, QUEUE_DEPTH, CONTENT_TYPE
+from fastapi.responses import Response
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Log records are written by a background thread from here on
+    setup_logging()
+
     # Startup - verify database connection
     try:
-        response = supabase_client.table('forms').select("count", count='exact').execute()
+        response = await forms_repository.execute(
+            forms_repository.query().select("count", count='exact')
+        )
         print("Database connection successful!")
     except Exception as e:
         print(f"Failed to connect to database: {str(e)}")
         raise e
+
+    # Background workers for executions queued with ?wait=false
+    execution_queue.start()
+
+    # Deliver email, SMS and Slack messages recorded by executions
+    if settings.OUTBOX_ENABLED:
+        outbox_dispatcher.start()
+
+    # Drop ChatGPT responses that expired on disk while the app was down
+    try:
+        await response_cache.purge_expired()
+    except Exception as e:
+        logger.error("Failed to purge expired ChatGPT responses: %s", e)
+
+    # Idempotency keys are only read until they expire
+    try:
+        await idempotency_store.purge_expired()
+    except Exception as e:
+        logger.error("Failed to purge expired idempotency keys: %s", e)
     
     yield
     # Shutdown
     print("Shutting down...")
+    await execution_queue.stop()
+    await outbox_dispatcher.stop()
+    await http_clients.close()
+    await smtp_pool.close()
+    shutdown_logging()
 
 
 # Database setup
@@ -99,7 +142,7 @@ def generate_table_class(form_definition: dict):
     return type(table_name, (Base,), columns)
 
 # Create FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -109,9 +152,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Times every request under its route template for /metrics
+app.add_middleware(MetricsMiddleware)
+
 
 app.include_router(api_router, prefix="/api/v1")
 
+QUEUE_DEPTH.set_function(lambda: execution_queue.depth, queue="executions")
+QUEUE_DEPTH.set_function(lambda: outbox_dispatcher.depth, queue="outbox")
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE)
+
 # Dependency
 def get_db():
     db = SessionLocal()
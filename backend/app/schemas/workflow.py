@@ -51,4 +51,8 @@ class ActionConfig(BaseModel):
     workflow_id: str
     node_id: str
     action_type: str
-    config: Dict[str, Any] 
\ No newline at end of file
+    config: Dict[str, Any]
+
+class MathBatchRequest(BaseModel):
+    # Column-oriented submissions: field id -> one value per submission
+    columns: Dict[str, List[Any]]
@@ -1,6 +1,9 @@
 from typing import Dict, Any
-import openai
-from app.core.config import settings
+from app.services.template_engine import render_template
+from app.services.openai_client import get_openai_client
+from app.services.response_cache import response_cache
+from app.services.rate_limiter import rate_limiters
+from app.services.resilience import call_with_resilience
 import logging
 
 # Configure logging
@@ -18,8 +21,8 @@ class ChatGPTService:
             if not api_key:
                 raise ValueError("ChatGPT API key not found in configuration")
 
-            # Initialize OpenAI client with the node's API key
-            client = openai.OpenAI(api_key=api_key)
+            # Async client for the node's API key, reused across executions
+            client = get_openai_client(api_key)
             
             messages = []
             
@@ -28,10 +31,7 @@ class ChatGPTService:
                 form_context = "\n".join([f"{k}: {v}" for k, v in form_data.items()])
                 
                 # Replace form field placeholders in the prompt
-                prompt = config['prompt']
-                for field_name, field_value in form_data.items():
-                    placeholder = f"{{{{{field_name}}}}}"
-                    prompt = prompt.replace(placeholder, str(field_value))
+                prompt = render_template(config['prompt'], form_data)
                 
                 # Add system message with form data context
                 messages.append({
@@ -51,19 +51,35 @@ class ChatGPTService:
                 
                 logger.info("Using default assistant behavior")
 
+            completion_request = {
+                "model": config.get('model', 'gpt-3.5-turbo'),
+                "messages": messages,
+                "temperature": float(config.get('temperature', 0.7)),
+                "max_tokens": int(config.get('maxTokens', 2000))
+            }
+
+            # Nodes opt in to reusing earlier completions for identical requests
+            cache_key = None
+            if config.get('cacheResponses'):
+                cache_key = response_cache.make_key(**completion_request)
+                cached = await response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Using cached ChatGPT response")
+                    return {**cached, "cached": True}
+
             # Generate content using OpenAI
-            response = client.chat.completions.create(
-                model=config.get('model', 'gpt-3.5-turbo'),
-                messages=messages,
-                temperature=float(config.get('temperature', 0.7)),
-                max_tokens=int(config.get('maxTokens', 2000))
-            )
+            async def complete():
+                async with rate_limiters.limit("openai", api_key):
+                    return await client.chat.completions.create(**completion_request)
+
+            # Completions have no side effects, so any transient failure is retried
+            response = await call_with_resilience("openai:chat.completions", complete, idempotent=True)
 
             # Extract generated content
             generated_content = response.choices[0].message.content.strip()
             
             logger.info("Content generated successfully")
-            return {
+            result = {
                 "status": "success",
                 "content": generated_content,
                 "usage": {
@@ -73,6 +89,12 @@ class ChatGPTService:
                 }
             }
 
+            if cache_key:
+                ttl = config.get('cacheTtlSeconds')
+                await response_cache.set(cache_key, result, ttl=float(ttl) if ttl else None)
+
+            return result
+
         except Exception as e:
             logger.error(f"Failed to generate content: {str(e)}")
             return {
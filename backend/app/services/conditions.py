@@ -0,0 +1,156 @@
+from typing import Any, Callable, Dict, List, Mapping, Optional
+from functools import lru_cache
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+Predicate = Callable[[Mapping[str, Any]], bool]
+
+# Symbolic aliases accepted alongside the operator labels used by the workflow builder
+OPERATOR_ALIASES = {
+    "==": "Equal to",
+    "!=": "Not equal to",
+    ">": "Greater than",
+    "<": "Less than",
+    ">=": "Greater than or equal to",
+    "<=": "Less than or equal to",
+    "between": "Between",
+    "in": "In list",
+    "not in": "Not in list",
+    "regex": "Matches regex",
+}
+
+STRING_OPERATORS = {
+    "Equal to": lambda actual, expected: actual == expected,
+    "Not equal to": lambda actual, expected: actual != expected,
+    "Contains": lambda actual, expected: expected in actual,
+    "Does not contain": lambda actual, expected: expected not in actual,
+    "Starts with": lambda actual, expected: actual.startswith(expected),
+    "Ends with": lambda actual, expected: actual.endswith(expected),
+}
+
+NUMERIC_OPERATORS = {
+    "Greater than": lambda actual, expected: actual > expected,
+    "Less than": lambda actual, expected: actual < expected,
+    "Greater than or equal to": lambda actual, expected: actual >= expected,
+    "Less than or equal to": lambda actual, expected: actual <= expected,
+}
+
+
+def _always_false(data: Mapping[str, Any]) -> bool:
+    return False
+
+
+def _always_true(data: Mapping[str, Any]) -> bool:
+    return True
+
+
+def _as_list(value: Any) -> List[str]:
+    """Condition lists may be JSON arrays or comma-separated strings"""
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value]
+    return [item.strip() for item in str(value).split(",")]
+
+
+def _to_number(value: Any) -> Optional[float]:
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=512)
+def compile_regex(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+def compile_condition(condition: Dict[str, Any]) -> Predicate:
+    """Compile one condition, or a {"logic": "AND"|"OR", "conditions": [...]} group"""
+    if isinstance(condition.get("conditions"), list):
+        return compile_conditions(condition["conditions"], condition.get("logic", "AND"))
+
+    # Remove {{ }} and any extra spaces
+    field = str(condition.get("field", "")).strip("{}").strip()
+    operator = str(condition.get("operator", "")).strip()
+    operator = OPERATOR_ALIASES.get(operator.lower(), operator)
+    value = condition.get("value", "")
+
+    def actual_text(data: Mapping[str, Any]) -> str:
+        return str(data.get(field, "")).strip()
+
+    if operator in STRING_OPERATORS:
+        compare = STRING_OPERATORS[operator]
+        expected = str(value).strip()
+        return lambda data: compare(actual_text(data), expected)
+
+    if operator in NUMERIC_OPERATORS:
+        compare = NUMERIC_OPERATORS[operator]
+        expected = _to_number(value)
+        if expected is None:
+            logger.warning("Condition on '%s' has a non-numeric value: %r", field, value)
+            return _always_false
+
+        def numeric(data: Mapping[str, Any]) -> bool:
+            actual = _to_number(data.get(field))
+            return actual is not None and compare(actual, expected)
+        return numeric
+
+    if operator == "Between":
+        bounds = [_to_number(bound) for bound in _as_list(value)]
+        if len(bounds) != 2 or None in bounds:
+            logger.warning("Between condition on '%s' needs two numeric bounds: %r", field, value)
+            return _always_false
+        low, high = sorted(bounds)
+
+        def between(data: Mapping[str, Any]) -> bool:
+            actual = _to_number(data.get(field))
+            return actual is not None and low <= actual <= high
+        return between
+
+    if operator in ("In list", "Not in list"):
+        members = frozenset(_as_list(value))
+        if operator == "In list":
+            return lambda data: actual_text(data) in members
+        return lambda data: actual_text(data) not in members
+
+    if operator == "Matches regex":
+        try:
+            pattern = compile_regex(str(value))
+        except re.error as e:
+            logger.warning("Invalid regex in condition on '%s': %s", field, e)
+            return _always_false
+        return lambda data: pattern.search(actual_text(data)) is not None
+
+    logger.warning("Unknown operator: %s", operator)
+    return _always_false
+
+
+def compile_conditions(conditions: Optional[List[Dict[str, Any]]], logic: str = "AND") -> Predicate:
+    """Compile a list of conditions into a single short-circuiting predicate.
+
+    An empty list always passes, matching edges without conditions.
+    """
+    if not conditions:
+        return _always_true
+
+    predicates = tuple(compile_condition(condition) for condition in conditions)
+    combine = any if str(logic).upper() == "OR" else all
+
+    def evaluate(data: Mapping[str, Any]) -> bool:
+        try:
+            return combine(predicate(data) for predicate in predicates)
+        except Exception as e:
+            logger.error("Error evaluating conditions: %s", e)
+            return False
+    return evaluate
+
+
+def compile_edge_predicate(edge: Dict[str, Any]) -> Predicate:
+    """Malformed stored conditions make the edge never pass, as when evaluating them failed"""
+    try:
+        data = edge.get("data") or {}
+        return compile_conditions(data.get("conditions", []), data.get("logic", "AND"))
+    except Exception as e:
+        logger.warning("Invalid conditions on edge %s -> %s: %s", edge.get("source"), edge.get("target"), e)
+        return _always_false
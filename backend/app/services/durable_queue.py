@@ -0,0 +1,272 @@
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+from uuid import uuid4
+import asyncio
+import json
+import logging
+import os
+import socket
+from sqlalchemy import text
+from app.core.cache import TTLCache
+from app.db.postgres import get_engine
+from app.schemas.workflow import ExecutionStatus
+from app.services.workflow_cache import workflow_cache
+from app.services.workflow_executor import WorkflowExecutor
+
+logger = logging.getLogger(__name__)
+
+# Oldest PENDING row first; RUNNING rows whose lease ran out are reclaimed
+# until they reach the attempt limit
+CLAIM_SQL = text("""
+    UPDATE workflow_executions
+    SET status = 'running',
+        lease_owner = :owner,
+        lease_expires_at = now() + :lease_seconds * interval '1 second',
+        heartbeat_at = now(),
+        attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM workflow_executions
+        WHERE status = 'pending'
+           OR (status = 'running' AND lease_expires_at < now() AND attempts < :max_attempts)
+        ORDER BY started_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, workflow_id, workflow_version, status, trigger_type, trigger_data, started_at, attempts
+""")
+
+RENEW_LEASE_SQL = text("""
+    UPDATE workflow_executions
+    SET heartbeat_at = now(),
+        lease_expires_at = now() + :lease_seconds * interval '1 second'
+    WHERE id = :id AND lease_owner = :owner AND status = 'running'
+""")
+
+FINISH_SQL = text("""
+    UPDATE workflow_executions
+    SET status = :status,
+        error_message = :error_message,
+        trace = CAST(:trace AS jsonb),
+        completed_at = now(),
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE id = :id AND lease_owner = :owner
+""")
+
+EXPIRE_SQL = text("""
+    UPDATE workflow_executions
+    SET status = 'failed',
+        error_message = 'Execution lease expired after ' || attempts || ' attempts',
+        completed_at = now(),
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE status = 'running' AND lease_expires_at < now() AND attempts >= :max_attempts
+""")
+
+PENDING_COUNT_SQL = text("SELECT count(*) FROM workflow_executions WHERE status = 'pending'")
+
+STATUS_SQL = text("SELECT status, error_message FROM workflow_executions WHERE id = :id")
+
+
+class PostgresExecutionQueue:
+    """Durable execution queue backed by the workflow_executions table.
+
+    Any replica's workers claim PENDING rows with FOR UPDATE SKIP LOCKED and hold
+    them under a lease renewed by heartbeats. A row whose worker died is claimed
+    again once its lease expires, up to ``max_attempts`` times. Same interface
+    as ExecutionQueue; the API inserts the PENDING row, so enqueue only wakes
+    the local workers. ``load_workflow`` fetches a claimed execution's workflow
+    definition, the shared workflow cache by default.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        lease_seconds: float,
+        heartbeat_seconds: float,
+        poll_interval: float,
+        max_attempts: int,
+        result_ttl: float,
+        load_workflow: Callable[[str], Awaitable[Optional[Dict[str, Any]]]] = workflow_cache.get
+    ):
+        self.worker_count = workers
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.load_workflow = load_workflow
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._results = TTLCache(max_size=1000, ttl=result_ttl)
+        self._depth = 0
+
+    @property
+    def depth(self) -> int:
+        """PENDING executions across all replicas, as of the last maintenance pass"""
+        return self._depth
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(index), name=f"execution-worker-{index}")
+            for index in range(self.worker_count)
+        ]
+        self._tasks.append(asyncio.create_task(self._maintain(), name="execution-queue-maintenance"))
+        logger.info("Started %d durable execution workers as %s", self.worker_count, self.owner)
+
+    async def stop(self) -> None:
+        # Executions in flight keep their lease and are reclaimed once it expires
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, execution: Dict[str, Any], workflow: Dict[str, Any]) -> None:
+        """The PENDING row is the queue entry; just wake an idle worker"""
+        self.start()
+        self._wakeup.set()
+
+    def get_result(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        return self._results.get(execution_id)
+
+    async def wait(self, execution_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait up to timeout seconds for an execution run by any replica"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            result = self._results.get(execution_id)
+            if result is not None:
+                return result
+
+            row = await asyncio.to_thread(self._fetch_one, STATUS_SQL, {"id": execution_id})
+            if row and row["status"] in (ExecutionStatus.COMPLETED.value, ExecutionStatus.FAILED.value):
+                return {"status": row["status"], "error": row["error_message"]}
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                execution = await asyncio.to_thread(self._fetch_one, CLAIM_SQL, {
+                    "owner": self.owner,
+                    "lease_seconds": self.lease_seconds,
+                    "max_attempts": self.max_attempts
+                })
+            except Exception as e:
+                logger.error("Failed to claim a queued execution: %s", e)
+                execution = None
+
+            if execution is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            await self._process(execution)
+
+    async def _process(self, execution: Dict[str, Any]) -> None:
+        execution_id = str(execution["id"])
+        execution["id"] = execution_id
+        execution["workflow_id"] = str(execution["workflow_id"])
+        logger.info("Claimed execution %s (attempt %s)", execution_id, execution['attempts'])
+
+        run = asyncio.ensure_future(self._execute(execution))
+        heartbeat = asyncio.ensure_future(self._heartbeat(execution_id))
+        try:
+            await asyncio.wait({run, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            heartbeat.cancel()
+            if not run.done():
+                run.cancel()
+
+        if run.cancelled():
+            # Lease lost: another worker owns the execution now
+            return
+        try:
+            result = run.result()
+        except Exception as e:
+            logger.error("Queued execution %s failed: %s", execution_id, e)
+            result = {"status": "failed", "error": str(e)}
+
+        status = ExecutionStatus.COMPLETED if result.get("status") == "completed" else ExecutionStatus.FAILED
+        try:
+            finished = await asyncio.to_thread(self._execute_sql, FINISH_SQL, {
+                "id": execution_id,
+                "owner": self.owner,
+                "status": status.value,
+                "error_message": result.get("error"),
+                "trace": json.dumps(result["trace"], default=str) if result.get("trace") else None
+            })
+            if not finished:
+                logger.warning("Lease on execution %s was lost before it finished", execution_id)
+        except Exception as e:
+            logger.error("Failed to record status of execution %s: %s", execution_id, e)
+        self._results.set(execution_id, result)
+
+    async def _execute(self, execution: Dict[str, Any]) -> Dict[str, Any]:
+        # Same cached definition and plan as inline executions, invalidated by API writes
+        workflow = await self.load_workflow(execution["workflow_id"])
+        if not workflow:
+            raise Exception("Workflow not found")
+
+        executor = WorkflowExecutor(execution)
+        executor.configure(workflow)
+        return await executor.execute_workflow(
+            nodes=workflow["nodes"],
+            edges=workflow["edges"],
+            trigger_data=execution.get("trigger_data") or {},
+            mode=workflow.get("execution_mode"),
+            max_concurrency=workflow.get("max_concurrency")
+        )
+
+    async def _heartbeat(self, execution_id: str) -> None:
+        """Renew the lease until cancelled; returns if the lease was lost"""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                renewed = await asyncio.to_thread(self._execute_sql, RENEW_LEASE_SQL, {
+                    "id": execution_id,
+                    "owner": self.owner,
+                    "lease_seconds": self.lease_seconds
+                })
+            except Exception as e:
+                # Transient failure; the lease may still outlive the next attempt
+                logger.error("Failed to renew lease on execution %s: %s", execution_id, e)
+                continue
+            if not renewed:
+                logger.warning("Lost lease on execution %s, abandoning it", execution_id)
+                return
+
+    async def _maintain(self) -> None:
+        """Fail executions that ran out of attempts and refresh the queue depth"""
+        while True:
+            try:
+                expired = await asyncio.to_thread(self._execute_sql, EXPIRE_SQL, {
+                    "max_attempts": self.max_attempts
+                })
+                if expired:
+                    logger.warning("Marked %s executions failed after %s expired leases", expired, self.max_attempts)
+                self._depth = await asyncio.to_thread(self._fetch_scalar, PENDING_COUNT_SQL)
+            except Exception as e:
+                logger.error("Execution queue maintenance failed: %s", e)
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    def _fetch_one(self, statement, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with get_engine().begin() as connection:
+            row = connection.execute(statement, params).mappings().first()
+            return dict(row) if row else None
+
+    def _fetch_scalar(self, statement) -> Any:
+        with get_engine().connect() as connection:
+            return connection.execute(statement).scalar()
+
+    def _execute_sql(self, statement, params: Dict[str, Any]) -> int:
+        """Run an UPDATE in its own transaction and return the affected row count"""
+        with get_engine().begin() as connection:
+            return connection.execute(statement, params).rowcount
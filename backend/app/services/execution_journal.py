@@ -0,0 +1,174 @@
+from typing import Callable, Dict, Any, List, Optional
+from datetime import datetime
+from uuid import uuid4
+import asyncio
+import logging
+import time
+from app.core.config import settings
+from app.db.repository import TableRepository, node_executions_repository, outbox_repository
+from app.schemas.workflow import ExecutionStatus
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionJournal:
+    """Write-behind buffer for node_executions rows of one workflow execution.
+
+    Node state changes are kept in memory and written with a single bulk upsert
+    once ``max_batch`` rows are dirty, ``flush_interval`` seconds after the
+    first unwritten change (a timer, so a slow node does not hold rows back),
+    or when the owner calls ``flush()`` at the end of the execution.
+
+    Outbox rows recorded by side-effecting nodes are written after their node's
+    final row, never before: once an outbox row exists the dispatcher may
+    deliver it and record the outcome on the node row at any moment, so the
+    journal stops writing that node (it is handed off). ``on_flush`` is called
+    after a flush that wrote outbox rows.
+    """
+
+    def __init__(
+        self,
+        workflow_execution_id: str,
+        repository: TableRepository = node_executions_repository,
+        outbox: TableRepository = outbox_repository,
+        max_batch: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        on_flush: Optional[Callable[[], None]] = None
+    ):
+        self.workflow_execution_id = workflow_execution_id
+        self.repository = repository
+        self.outbox = outbox
+        self.max_batch = max_batch or settings.JOURNAL_MAX_BATCH
+        self.flush_interval = flush_interval if flush_interval is not None else settings.JOURNAL_FLUSH_INTERVAL_SECONDS
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._dirty: set = set()
+        self._outbox: List[Dict[str, Any]] = []
+        self._finished: set = set()
+        self._handed_off: set = set()
+        self.on_flush = on_flush
+        self._lock = asyncio.Lock()
+        self._last_flush = time.monotonic()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def record_start(self, node_id: str) -> Dict[str, Any]:
+        """Record a node as RUNNING and return its node execution row"""
+        record = {
+            "id": str(uuid4()),
+            "workflow_execution_id": self.workflow_execution_id,
+            "node_id": node_id,
+            "status": ExecutionStatus.RUNNING,
+            "started_at": datetime.utcnow().isoformat(),
+            # Bulk upserts need every row to carry the same columns
+            "completed_at": None,
+            "output_data": None,
+            "error_message": None
+        }
+        self._records[record["id"]] = record
+        self._dirty.add(record["id"])
+        await self._maybe_flush()
+        return dict(record)
+
+    async def record_finish(
+        self,
+        node_execution_id: str,
+        status: str,
+        output_data: Dict[str, Any] = None,
+        error_message: str = None
+    ) -> None:
+        """Record the final state of a node execution"""
+        record = self._records.get(node_execution_id)
+        if record is None:
+            raise Exception("Failed to update node execution record")
+
+        if node_execution_id in self._handed_off:
+            logger.warning("Node execution %s belongs to the outbox dispatcher, not updating it", node_execution_id)
+            return
+
+        record["status"] = status
+        # A node still RUNNING (its message is queued) is completed by the dispatcher
+        if status != ExecutionStatus.RUNNING:
+            record["completed_at"] = datetime.utcnow().isoformat()
+        if output_data is not None:
+            record["output_data"] = output_data
+        if error_message is not None:
+            record["error_message"] = error_message
+
+        if status == ExecutionStatus.FAILED:
+            # The node failed after queueing its message; do not send it
+            self._outbox = [row for row in self._outbox if row["node_execution_id"] != node_execution_id]
+
+        self._dirty.add(node_execution_id)
+        self._finished.add(node_execution_id)
+        await self._maybe_flush()
+
+    async def record_outbox(self, node_execution_id: str, provider: str, payload: Dict[str, Any]) -> str:
+        """Record a provider call for the outbox dispatcher and return the outbox row id"""
+        row = {
+            "id": str(uuid4()),
+            "workflow_execution_id": self.workflow_execution_id,
+            "node_execution_id": node_execution_id,
+            "provider": provider,
+            "payload": payload,
+            "status": "pending",
+            "created_at": datetime.utcnow().isoformat()
+        }
+        self._outbox.append(row)
+        await self._maybe_flush()
+        return row["id"]
+
+    async def _maybe_flush(self) -> None:
+        if (len(self._dirty) + len(self._outbox) >= self.max_batch or
+                time.monotonic() - self._last_flush >= self.flush_interval):
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception:
+            # Already logged; the rows stay buffered for the next flush
+            pass
+
+    async def flush(self) -> None:
+        """Write all pending rows; rows are kept for the next flush if the write fails"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            # Outbox rows wait until their node's final row is written with this flush or before it
+            outbox = [row for row in self._outbox if row["node_execution_id"] in self._finished]
+            if not self._dirty and not outbox:
+                return
+            self._outbox = [row for row in self._outbox if row["node_execution_id"] not in self._finished]
+            pending = self._dirty
+            self._dirty = set()
+            rows = [dict(self._records[record_id]) for record_id in pending]
+            try:
+                try:
+                    if rows:
+                        await self.repository.upsert(rows)
+                except Exception:
+                    self._dirty |= pending
+                    self._outbox = outbox + self._outbox
+                    logger.error("Failed to flush %d node execution records", len(rows))
+                    raise
+
+                try:
+                    # Rows that already exist are left alone, so a retried flush
+                    # never resets a row the dispatcher has claimed
+                    if outbox:
+                        await self.outbox.upsert(outbox, ignore_duplicates=True)
+                except Exception:
+                    self._outbox = outbox + self._outbox
+                    logger.error("Failed to flush %d outbox rows", len(outbox))
+                    raise
+            finally:
+                self._last_flush = time.monotonic()
+
+            self._handed_off.update(row["node_execution_id"] for row in outbox)
+            logger.info("Flushed %d node execution records and %d outbox rows", len(rows), len(outbox))
+        if outbox and self.on_flush is not None:
+            self.on_flush()
@@ -0,0 +1,110 @@
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import logging
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.workflow_executor import WorkflowExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionQueue:
+    """In-process queue of PENDING workflow executions drained by background workers.
+
+    Results are kept in memory for a while so clients can poll or wait on them;
+    the execution status itself is persisted by WorkflowExecutor.run.
+    """
+
+    def __init__(self, workers: int, max_size: int, result_ttl: float):
+        self.worker_count = workers
+        self._queue: "asyncio.Queue[Tuple[Dict[str, Any], Dict[str, Any]]]" = asyncio.Queue(maxsize=max_size)
+        self._workers: List[asyncio.Task] = []
+        self._results = TTLCache(max_size=max(max_size, 1000), ttl=result_ttl)
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(index), name=f"execution-worker-{index}")
+            for index in range(self.worker_count)
+        ]
+        logger.info("Started %d execution queue workers", self.worker_count)
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def enqueue(self, execution: Dict[str, Any], workflow: Dict[str, Any]) -> None:
+        """Queue a PENDING execution; raises asyncio.QueueFull when the backlog is full"""
+        self.start()
+        self._queue.put_nowait((execution, workflow))
+
+    def get_result(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        return self._results.get(execution_id)
+
+    async def wait(self, execution_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait up to timeout seconds for a queued execution handled by this process"""
+        result = self._results.get(execution_id)
+        if result is not None:
+            return result
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(execution_id, []).append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(execution_id, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+            if not waiters:
+                self._waiters.pop(execution_id, None)
+
+    def _finish(self, execution_id: str, result: Dict[str, Any]) -> None:
+        self._results.set(execution_id, result)
+        for waiter in self._waiters.pop(execution_id, []):
+            if not waiter.done():
+                waiter.set_result(result)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            execution, workflow = await self._queue.get()
+            try:
+                executor = WorkflowExecutor(execution)
+                result = await executor.run(workflow)
+            except Exception as e:
+                logger.error(f"Queued execution {execution.get('id')} failed: {str(e)}")
+                result = {"status": "failed", "error": str(e)}
+            finally:
+                self._queue.task_done()
+            self._finish(execution['id'], result)
+
+
+def create_execution_queue():
+    """Queue selected by EXECUTION_QUEUE_BACKEND"""
+    if settings.EXECUTION_QUEUE_BACKEND == "postgres":
+        from app.services.durable_queue import PostgresExecutionQueue
+        return PostgresExecutionQueue(
+            workers=settings.EXECUTION_QUEUE_WORKERS,
+            lease_seconds=settings.EXECUTION_LEASE_SECONDS,
+            heartbeat_seconds=settings.EXECUTION_HEARTBEAT_SECONDS,
+            poll_interval=settings.EXECUTION_POLL_INTERVAL_SECONDS,
+            max_attempts=settings.EXECUTION_MAX_ATTEMPTS,
+            result_ttl=settings.EXECUTION_RESULT_TTL_SECONDS
+        )
+    return ExecutionQueue(
+        workers=settings.EXECUTION_QUEUE_WORKERS,
+        max_size=settings.EXECUTION_QUEUE_MAX_SIZE,
+        result_ttl=settings.EXECUTION_RESULT_TTL_SECONDS
+    )
+
+
+execution_queue = create_execution_queue()
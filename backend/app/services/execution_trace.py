@@ -0,0 +1,53 @@
+from typing import Dict, Any, List, Optional
+import time
+from app.core.config import settings
+
+
+class ExecutionTrace:
+    """Structured debug events of one execution, stored with it when it finishes.
+
+    Only created when DEBUG is enabled for the execution (see ExecutionLogger);
+    other executions get NULL_TRACE. Call sites guard with ``if trace:`` so the
+    default path builds no event arguments at all.
+    """
+
+    def __init__(self, max_events: Optional[int] = None):
+        self.max_events = max_events or settings.TRACE_MAX_EVENTS
+        self.events: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._started = time.perf_counter()
+
+    def __bool__(self) -> bool:
+        return True
+
+    def event(self, node_id: str, name: str, **fields: Any) -> None:
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        self.events.append({
+            "at_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "node_id": node_id,
+            "event": name,
+            **fields
+        })
+
+    def export(self) -> Dict[str, Any]:
+        return {"events": self.events, "dropped": self.dropped}
+
+
+class NullTrace:
+    """Stand-in when tracing is off; falsy so ``if trace:`` skips the event"""
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def event(self, node_id: str, name: str, **fields: Any) -> None:
+        pass
+
+    def export(self) -> None:
+        return None
+
+
+NULL_TRACE = NullTrace()
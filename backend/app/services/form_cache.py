@@ -0,0 +1,37 @@
+from typing import Dict, Any, Optional
+import logging
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.repository import forms_repository
+
+logger = logging.getLogger(__name__)
+
+
+class FormSchemaCache:
+    """TTL cache of form field definitions, indexed by field id"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self._fields = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def get_fields(self, form_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        fields = self._fields.get(form_id)
+        if fields is not None:
+            return fields
+
+        forms = await forms_repository.find(columns="form_data", id=form_id)
+        if not forms:
+            return None
+
+        fields = {field["id"]: field for field in forms[0].get("form_data") or []}
+        self._fields.set(form_id, fields)
+        return fields
+
+    def invalidate(self, form_id: str) -> None:
+        self._fields.pop(form_id)
+        logger.info("Invalidated cached form schema %s", form_id)
+
+
+form_schema_cache = FormSchemaCache(
+    max_size=settings.FORM_CACHE_SIZE,
+    ttl=settings.FORM_CACHE_TTL_SECONDS
+)
@@ -1,32 +1,13 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from typing import Dict, Any
 import logging
-from app.core.config import settings
-from pydantic import EmailStr
+from app.services.template_engine import render_template
+from app.services.smtp_pool import smtp_pool, build_message
 
 logger = logging.getLogger(__name__)
 
 class GmailService:
-    def __init__(self):
-        self.fastmail = None
-
     async def send_email(self, config: Dict[str, Any], form_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            # Create a new connection config for each email using the provided config
-            mail_conf = ConnectionConfig(
-                MAIL_USERNAME=config.get('username'),
-                MAIL_PASSWORD=config.get('password'),
-                MAIL_FROM=config.get('username'),  # Use username as from address
-                MAIL_PORT=int(config.get('port', 587)),
-                MAIL_SERVER=config.get('host'),
-                MAIL_STARTTLS=True,
-                MAIL_SSL_TLS=False,
-                USE_CREDENTIALS=True
-            )
-
-            # Create a new FastMail instance with the provided config
-            fastmail = FastMail(mail_conf)
-
             # Process template variables in email content
             to_email = self._process_template(config.get("to", ""), form_data)
             subject = self._process_template(config.get("subject", "Workflow Notification"), form_data)
@@ -39,17 +20,15 @@ class GmailService:
             if not to_email or "@" not in to_email:
                 raise ValueError(f"Invalid recipient email address: {to_email}")
 
-            # Create message
-            message = MessageSchema(
-                subject=subject,
-                recipients=[to_email],
-                body=body,
-                subtype="plain"
+            # Send over a pooled session for this account (username doubles as from address)
+            await smtp_pool.send(
+                host=config.get('host'),
+                port=int(config.get('port', 587)),
+                username=config.get('username'),
+                password=config.get('password'),
+                message=build_message(config.get('username'), to_email, subject, body)
             )
 
-            # Send email
-            await fastmail.send_message(message)
-
             return {
                 "status": "success",
                 "message": "Email sent successfully",
@@ -69,12 +48,4 @@ class GmailService:
 
     def _process_template(self, template: str, data: Dict[str, Any]) -> str:
         """Replace {{field}} placeholders with actual values from form data"""
-        if not template:
-            return ""
-            
-        result = template
-        for key, value in data.items():
-            placeholder = f"{{{{{key}}}}}"
-            if placeholder in result:
-                result = result.replace(placeholder, str(value))
-        return result
\ No newline at end of file
+        return render_template(template, data)
@@ -0,0 +1,162 @@
+from typing import Dict, Any, Optional
+from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
+import json
+import logging
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.repository import execution_idempotency_repository
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyConflict(Exception):
+    """The key belongs to a request that is still running on another replica"""
+
+
+def trigger_fingerprint(workflow_id: str, trigger_data: Dict[str, Any]) -> str:
+    """Key for content-based dedup of identical trigger payloads"""
+    payload = json.dumps(trigger_data, sort_keys=True, default=str)
+    return f"trigger:{workflow_id}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+class IdempotencyStore:
+    """Maps idempotency keys to the response of the request that first used them.
+
+    Completed records are cached in memory in front of the execution_idempotency
+    table, which is indexed on expires_at. A duplicate that arrives while the
+    original is still running in this process waits for its response.
+
+    A claim only holds its key for ``pending_ttl`` seconds until the request
+    completes, so a key whose request died with its process can be taken over
+    by a retry; ``complete`` extends it to the full ``ttl``.
+    """
+
+    def __init__(self, ttl: float, pending_ttl: float, repository=execution_idempotency_repository):
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self.repository = repository
+        self._records = TTLCache(max_size=10000, ttl=ttl)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def begin(self, key: str, workflow_id: str, ttl: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Claim ``key``. Returns None if the caller should run the request, otherwise
+        the original's record ({"execution_id", "status_code", "response"})."""
+        record = self._records.get(key)
+        if record is not None:
+            return record
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        # Claim locally before the store round trip so concurrent duplicates queue up
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            record = await self._claim_in_store(key, workflow_id, min(self.pending_ttl, ttl or self.ttl))
+        except BaseException as e:
+            self._settle(key, exception=e)
+            raise
+
+        if record is not None:
+            self._records.set(key, record, ttl=ttl)
+            self._settle(key, result=record)
+        return record
+
+    async def complete(
+        self,
+        key: str,
+        execution_id: str,
+        status_code: int,
+        response: Any,
+        ttl: Optional[float] = None
+    ) -> None:
+        record = {"execution_id": execution_id, "status_code": status_code, "response": response}
+        self._records.set(key, record, ttl=ttl)
+        self._settle(key, result=record)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl or self.ttl)
+        try:
+            await self.repository.update(key, {**record, "expires_at": expires_at.isoformat()})
+        except Exception as e:
+            logger.error("Failed to store idempotency record %s: %s", key, e)
+
+    async def abandon(self, key: str, error: BaseException) -> None:
+        """Release a key whose request failed, so a retry runs it again"""
+        self._settle(key, exception=error)
+        try:
+            await self.repository.delete(key)
+        except Exception as e:
+            logger.error("Failed to release idempotency key %s: %s", key, e)
+
+    async def purge_expired(self) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        await self.repository.execute(self.repository.query().delete().lt("expires_at", now))
+
+    async def _claim_in_store(self, key: str, workflow_id: str, lease: float) -> Optional[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        claim = {
+            "id": key,
+            "workflow_id": workflow_id,
+            "execution_id": None,
+            "status_code": None,
+            "response": None,
+            "created_at": now.isoformat(),
+            "expires_at": (now + timedelta(seconds=lease)).isoformat()
+        }
+        try:
+            rows = await self.repository.find(id=key)
+            if rows:
+                row = rows[0]
+                if _parse_timestamp(row["expires_at"]) > now:
+                    if row.get("status_code") is None:
+                        raise IdempotencyConflict(key)
+                    return {
+                        "execution_id": row.get("execution_id"),
+                        "status_code": row["status_code"],
+                        "response": row.get("response")
+                    }
+                # Expired record or abandoned claim: take it over, unless another
+                # replica has just done so (its claim is no longer expired)
+                response = await self.repository.execute(
+                    self.repository.query().update(claim).eq("id", key).lt("expires_at", now.isoformat())
+                )
+                claimed = response.data
+            else:
+                claimed = await self.repository.upsert(claim, ignore_duplicates=True)
+        except IdempotencyConflict:
+            raise
+        except Exception as e:
+            # Deduplication is best effort; never block an execution on the store
+            logger.error("Idempotency store unavailable, continuing without it: %s", e)
+            return None
+
+        if not claimed:
+            # Another replica claimed the key between our read and write
+            raise IdempotencyConflict(key)
+        return None
+
+    def _settle(self, key: str, result: Any = None, exception: Optional[BaseException] = None) -> None:
+        future = self._in_flight.pop(key, None)
+        if future is None or future.done():
+            return
+        if isinstance(exception, asyncio.CancelledError):
+            future.cancel()
+        elif exception is not None:
+            future.set_exception(exception)
+            # Mark retrieved; waiters are optional
+            future.exception()
+        else:
+            future.set_result(result)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+idempotency_store = IdempotencyStore(
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    pending_ttl=settings.IDEMPOTENCY_PENDING_SECONDS
+)
@@ -0,0 +1,148 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from functools import lru_cache, reduce
+import numpy as np
+from app.services.math_expression import CompiledFormula, IF_FUNCTION_NAME
+
+# Element-wise counterparts of the scalar formula functions
+VECTOR_FUNCTIONS = {
+    "min": lambda *values: reduce(np.minimum, values),
+    "max": lambda *values: reduce(np.maximum, values),
+    "round": lambda value, digits=0: np.round(value, int(digits)),
+    "abs": np.abs,
+    IF_FUNCTION_NAME: lambda condition, when_true, when_false: np.where(condition, when_true, when_false),
+    "and": np.logical_and,
+    "or": np.logical_or,
+    "not": np.logical_not,
+}
+
+BASIC_OPERATIONS = {
+    'add': np.add,
+    'subtract': np.subtract,
+    'multiply': np.multiply,
+    'divide': np.true_divide,
+    'power': np.power,
+}
+
+
+@lru_cache(maxsize=256)
+def compile_vector_formula(formula: str) -> CompiledFormula:
+    return CompiledFormula(formula, VECTOR_FUNCTIONS)
+
+
+class _Batch:
+    """Column-oriented submissions plus the first error recorded for each row"""
+
+    def __init__(self, columns: Mapping[str, Sequence[Any]]):
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns in a batch must have the same length")
+        self.columns = columns
+        self.size = lengths.pop() if lengths else 0
+        self.errors: List[Optional[str]] = [None] * self.size
+        self._numeric: Dict[str, np.ndarray] = {}
+
+    def fail(self, row: int, message: str) -> None:
+        if self.errors[row] is None:
+            self.errors[row] = message
+
+    def column(self, name: str) -> np.ndarray:
+        """A field as a float array; rows that cannot be converted become NaN with an error"""
+        if name in self._numeric:
+            return self._numeric[name]
+
+        values = self.columns.get(name)
+        if values is None:
+            for row in range(self.size):
+                self.fail(row, f"Field {name} not found in form data")
+            array = np.full(self.size, np.nan)
+        else:
+            try:
+                array = np.asarray(values, dtype=float)
+            except (TypeError, ValueError):
+                array = np.empty(self.size)
+                for row, value in enumerate(values):
+                    array[row] = self._to_float(row, name, value)
+            else:
+                for row in np.flatnonzero(np.isnan(array)):
+                    self.fail(row, f"Field {name} not found in form data")
+
+        self._numeric[name] = array
+        return array
+
+    def _to_float(self, row: int, name: str, value: Any) -> float:
+        if value is None:
+            self.fail(row, f"Field {name} not found in form data")
+            return np.nan
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            self.fail(row, f"Field '{name}' value '{value}' cannot be converted to number")
+            return np.nan
+
+    def value(self, input_str: str, default: str = '0') -> Any:
+        """Same input syntax as the scalar math node: {{field}} or a literal number"""
+        if not input_str:
+            return float(default)
+        if input_str.startswith('{{') and input_str.endswith('}}'):
+            return self.column(input_str[2:-2])
+        return float(input_str)
+
+
+def evaluate_math_batch(config: Dict[str, Any], columns: Mapping[str, Sequence[Any]]) -> Dict[str, Any]:
+    """Evaluate a math node configuration over many submissions at once.
+
+    ``columns`` maps each form field to its values, one per submission. Rows that
+    fail (missing or non-numeric fields, division by zero) get a None result and
+    an error message at the same index.
+    """
+    batch = _Batch(columns)
+    operation = config.get('operation')
+    inputs = config.get('inputs', {})
+
+    with np.errstate(all='ignore'):
+        if operation == 'custom':
+            formula = config.get('customFormula', '')
+            if not formula:
+                raise ValueError("Custom formula is empty")
+            compiled = compile_vector_formula(formula)
+            result = compiled.compute({name: batch.column(name) for name in compiled.variables})
+
+        elif operation in BASIC_OPERATIONS:
+            result = BASIC_OPERATIONS[operation](
+                batch.value(inputs.get('value1', '0')),
+                batch.value(inputs.get('value2', '0'))
+            )
+
+        elif operation == 'gst':
+            value = batch.value(inputs.get('value1', '0'))
+            rate = float(inputs.get('taxRate', '0'))
+            result = value + (value * rate) / 100
+
+        elif operation == 'discount':
+            value = batch.value(inputs.get('value1', '0'))
+            rate = float(inputs.get('discountRate', '0'))
+            result = value - (value * rate) / 100
+
+        else:
+            raise ValueError(f"Unsupported operation: {operation}")
+
+        result = np.broadcast_to(np.asarray(result, dtype=float), (batch.size,))
+        round_decimals = config.get('roundDecimals')
+        if round_decimals is not None:
+            result = np.round(result, int(round_decimals))
+
+    for row in np.flatnonzero(~np.isfinite(result)):
+        batch.fail(row, "Result is not a finite number")
+
+    results = [
+        None if error is not None else value
+        for value, error in zip(result.tolist(), batch.errors)
+    ]
+    return {
+        "status": "success",
+        "outputVariable": config.get('outputVariable', 'result'),
+        "count": batch.size,
+        "failed": sum(error is not None for error in batch.errors),
+        "results": results,
+        "errors": batch.errors
+    }
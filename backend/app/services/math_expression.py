@@ -0,0 +1,197 @@
+from typing import Any, Callable, Dict, Mapping, Tuple
+from functools import lru_cache
+import ast
+import operator
+import re
+from app.services.template_engine import PLACEHOLDER_PATTERN
+
+Evaluator = Callable[[Mapping[str, Any]], Any]
+
+# `if` is a keyword, so if(cond, a, b) is rewritten to a callable name before parsing
+_IF_CALL = re.compile(r"\bif\s*\(")
+IF_FUNCTION_NAME = "if_"
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+COMPARE_OPERATORS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+
+
+def _scalar_round(value: float, digits: float = 0) -> float:
+    return round(value, int(digits))
+
+
+# Whitelisted functions for scalar evaluation; `if` is handled lazily by the compiler
+SCALAR_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "min": min,
+    "max": max,
+    "round": _scalar_round,
+    "abs": abs,
+    IF_FUNCTION_NAME: lambda condition, when_true, when_false: when_true if condition else when_false,
+    "and": lambda left, right: bool(left) and bool(right),
+    "or": lambda left, right: bool(left) or bool(right),
+    "not": lambda value: not value,
+}
+
+
+class FormulaError(ValueError):
+    pass
+
+
+class CompiledFormula:
+    """A formula parsed once into a tree of closures over named variables.
+
+    ``{{field}}`` placeholders and bare identifiers are both variables; their
+    values are looked up in the inputs passed to ``evaluate``.
+    """
+
+    def __init__(self, source: str, functions: Dict[str, Callable[..., Any]] = SCALAR_FUNCTIONS):
+        self.source = source
+        self.functions = functions
+        placeholders: Dict[str, str] = {}
+
+        def substitute(match: re.Match) -> str:
+            name = match.group(1).strip()
+            for alias, field in placeholders.items():
+                if field == name:
+                    return alias
+            alias = f"__v{len(placeholders)}"
+            placeholders[alias] = name
+            return alias
+
+        expression = PLACEHOLDER_PATTERN.sub(substitute, source)
+        expression = _IF_CALL.sub(f"{IF_FUNCTION_NAME}(", expression)
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as e:
+            raise FormulaError(f"Invalid formula: {e.msg}")
+
+        self._aliases = placeholders
+        variables = []
+        self._evaluate = self._compile(tree.body, variables)
+        self.variables: Tuple[str, ...] = tuple(dict.fromkeys(variables))
+
+    def _compile(self, node: ast.AST, variables: list) -> Evaluator:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            # Floats overflow instead of growing unbounded like ints under **
+            value = float(node.value)
+            return lambda env: value
+
+        if isinstance(node, ast.Name):
+            name = self._aliases.get(node.id, node.id)
+            variables.append(name)
+            return lambda env: env[name]
+
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            op = BINARY_OPERATORS[type(node.op)]
+            left, right = self._compile(node.left, variables), self._compile(node.right, variables)
+            return lambda env: op(left(env), right(env))
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand, variables)
+            if isinstance(node.op, ast.Not):
+                negate = self.functions["not"]
+                return lambda env: negate(operand(env))
+            if type(node.op) in UNARY_OPERATORS:
+                op = UNARY_OPERATORS[type(node.op)]
+                return lambda env: op(operand(env))
+
+        if isinstance(node, ast.Compare):
+            left = self._compile(node.left, variables)
+            comparisons = [
+                (COMPARE_OPERATORS[type(op)], self._compile(comparator, variables))
+                for op, comparator in zip(node.ops, node.comparators)
+                if type(op) in COMPARE_OPERATORS
+            ]
+            if len(comparisons) != len(node.ops):
+                raise FormulaError("Unsupported comparison in formula")
+            combine = self.functions["and"]
+
+            def compare(env: Mapping[str, Any]) -> Any:
+                current, result = left(env), True
+                for op, comparator in comparisons:
+                    value = comparator(env)
+                    result = combine(result, op(current, value))
+                    current = value
+                return result
+            return compare
+
+        if isinstance(node, ast.BoolOp):
+            combine = self.functions["and" if isinstance(node.op, ast.And) else "or"]
+            operands = [self._compile(value, variables) for value in node.values]
+
+            def boolean(env: Mapping[str, Any]) -> Any:
+                result = operands[0](env)
+                for operand in operands[1:]:
+                    result = combine(result, operand(env))
+                return result
+            return boolean
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name = node.func.id
+            if name not in self.functions or name in ("and", "or", "not"):
+                raise FormulaError(f"Function '{name}' is not allowed in formulas")
+            args = [self._compile(arg, variables) for arg in node.args]
+            if name == IF_FUNCTION_NAME:
+                if len(args) != 3:
+                    raise FormulaError("if() takes exactly 3 arguments")
+                if self.functions is SCALAR_FUNCTIONS:
+                    # Only the selected branch is evaluated
+                    condition, when_true, when_false = args
+                    return lambda env: when_true(env) if condition(env) else when_false(env)
+            function = self.functions[name]
+            return lambda env: function(*[arg(env) for arg in args])
+
+        raise FormulaError(f"Unsupported expression in formula: {type(node).__name__}")
+
+    def bind(self, inputs: Mapping[str, Any]) -> Dict[str, float]:
+        """Pick and coerce the variables this formula needs from inputs"""
+        values = {}
+        for name in self.variables:
+            value = inputs.get(name)
+            if value is None:
+                raise FormulaError(f"Field {name} not found in form data")
+            try:
+                values[name] = float(value)
+            except (ValueError, TypeError):
+                raise FormulaError(f"Field '{name}' value '{value}' cannot be converted to number")
+        return values
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        """The source with each bound ``{{field}}`` placeholder replaced by its value"""
+        def substitute(match: re.Match) -> str:
+            name = match.group(1).strip()
+            return str(values[name]) if name in values else match.group(0)
+
+        return PLACEHOLDER_PATTERN.sub(substitute, self.source)
+
+    def compute(self, values: Mapping[str, Any]) -> Any:
+        """Evaluate against already bound variable values"""
+        return self._evaluate(values)
+
+    def evaluate(self, inputs: Mapping[str, Any]) -> float:
+        return float(self._evaluate(self.bind(inputs)))
+
+
+@lru_cache(maxsize=512)
+def compile_formula(formula: str) -> CompiledFormula:
+    return CompiledFormula(formula)
@@ -0,0 +1,28 @@
+import openai
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.http import http_clients
+
+# One async client per API key; they all share the pooled "openai" HTTP client,
+# so keep-alive connections survive across nodes, executions and keys.
+# Entries are (http client, OpenAI client) pairs.
+_clients = TTLCache(max_size=settings.OPENAI_CLIENT_CACHE_SIZE)
+
+
+def get_openai_client(api_key: str) -> openai.AsyncOpenAI:
+    http_client = http_clients.get("openai")
+    cached = _clients.get(api_key)
+    # The registry replaces its clients after shutdown closes them (lifespan restarts);
+    # an OpenAI client built on a closed one would fail every request
+    if cached is not None and cached[0] is http_client:
+        return cached[1]
+
+    client = openai.AsyncOpenAI(
+        api_key=api_key,
+        timeout=settings.OPENAI_TIMEOUT_SECONDS,
+        # Retries happen in call_with_resilience, behind the circuit breaker
+        max_retries=0,
+        http_client=http_client
+    )
+    _clients.set(api_key, (http_client, client))
+    return client
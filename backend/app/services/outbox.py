@@ -0,0 +1,300 @@
+from typing import Dict, Any, List, Optional
+from uuid import uuid4
+import asyncio
+import json
+import logging
+import os
+import socket
+from sqlalchemy import text
+from app.core.config import settings
+from app.db.postgres import get_engine
+from app.schemas.workflow import ExecutionStatus
+from app.services.gmail_service import GmailService
+from app.services.slack_service import SlackService
+from app.services.sms_service import SMSService
+
+logger = logging.getLogger(__name__)
+
+# Oldest pending rows of one provider; 'sending' rows whose lease ran out (the
+# dispatcher died mid-batch) are claimed again until they reach the attempt limit
+CLAIM_SQL = text("""
+    UPDATE outbox
+    SET status = 'sending',
+        lease_owner = :owner,
+        lease_expires_at = now() + :lease_seconds * interval '1 second',
+        attempts = attempts + 1
+    WHERE id IN (
+        SELECT id FROM outbox
+        WHERE provider = :provider
+          AND (status = 'pending'
+               OR (status = 'sending' AND lease_expires_at < now() AND attempts < :max_attempts))
+        ORDER BY created_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, workflow_execution_id, node_execution_id, provider, payload, attempts
+""")
+
+RENEW_LEASE_SQL = text("""
+    UPDATE outbox
+    SET lease_expires_at = now() + :lease_seconds * interval '1 second'
+    WHERE id = ANY(:ids) AND lease_owner = :owner AND status = 'sending'
+""")
+
+FINISH_SQL = text("""
+    UPDATE outbox
+    SET status = :status,
+        result = CAST(:result AS jsonb),
+        error_message = :error_message,
+        completed_at = now(),
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE id = :id AND lease_owner = :owner
+""")
+
+# The node was recorded as queued; replace that with the delivery outcome
+NODE_RESULT_SQL = text("""
+    UPDATE node_executions
+    SET status = :node_status,
+        output_data = CAST(:result AS jsonb),
+        error_message = :error_message,
+        completed_at = now()
+    WHERE id = :node_execution_id
+""")
+
+EXPIRE_SQL = text("""
+    UPDATE outbox
+    SET status = 'failed',
+        error_message = 'Delivery lease expired after ' || attempts || ' attempts',
+        completed_at = now(),
+        lease_owner = NULL,
+        lease_expires_at = NULL
+    WHERE status = 'sending' AND lease_expires_at < now() AND attempts >= :max_attempts
+""")
+
+PENDING_COUNT_SQL = text("SELECT count(*) FROM outbox WHERE status = 'pending'")
+
+
+class OutboxDispatcher:
+    """Delivers outbox rows written by email, SMS and Slack nodes.
+
+    One dispatcher task per provider claims up to ``batch_size`` rows at a time
+    with FOR UPDATE SKIP LOCKED, so any number of replicas can share the table,
+    delivers them with at most ``concurrency[provider]`` calls in flight and
+    marks the whole batch done in one transaction. Single SMS rows that share
+    a gateway account go out through one bulk request. Delivery is at least
+    once: a batch whose dispatcher died is claimed again after its lease.
+    """
+
+    PROVIDERS = ("email", "sms", "slack")
+
+    def __init__(
+        self,
+        batch_size: int,
+        concurrency: Dict[str, int],
+        poll_interval: float,
+        lease_seconds: float,
+        max_attempts: int
+    ):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.gmail_service = GmailService()
+        self.slack_service = SlackService()
+        self.sms_service = SMSService()
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = {provider: asyncio.Event() for provider in self.PROVIDERS}
+        self._depth = 0
+
+    @property
+    def depth(self) -> int:
+        """Pending outbox rows across all replicas, as of the last maintenance pass"""
+        return self._depth
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._dispatch(provider), name=f"outbox-{provider}")
+            for provider in self.PROVIDERS
+        ]
+        self._tasks.append(asyncio.create_task(self._maintain(), name="outbox-maintenance"))
+        logger.info("Started outbox dispatchers as %s", self.owner)
+
+    async def stop(self) -> None:
+        # Batches in flight keep their lease and are redelivered once it expires
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """New rows were flushed; wake the idle dispatchers instead of waiting for the poll"""
+        for event in self._wakeup.values():
+            event.set()
+
+    async def _dispatch(self, provider: str) -> None:
+        wakeup = self._wakeup[provider]
+        while True:
+            try:
+                rows = await asyncio.to_thread(self._fetch_all, CLAIM_SQL, {
+                    "provider": provider,
+                    "owner": self.owner,
+                    "lease_seconds": self.lease_seconds,
+                    "max_attempts": self.max_attempts,
+                    "batch_size": self.batch_size
+                })
+            except Exception as e:
+                logger.error("Failed to claim %s outbox rows: %s", provider, e)
+                rows = []
+
+            if not rows:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+                continue
+
+            await self._process(provider, rows)
+
+    async def _process(self, provider: str, rows: List[Dict[str, Any]]) -> None:
+        logger.info("Delivering %s %s outbox rows", len(rows), provider)
+        heartbeat = asyncio.ensure_future(self._heartbeat([row["id"] for row in rows]))
+        try:
+            results = await self._deliver(provider, rows)
+        finally:
+            heartbeat.cancel()
+
+        try:
+            await asyncio.to_thread(self._finish, rows, results)
+        except Exception as e:
+            # The rows stay leased and are delivered again once the lease expires
+            logger.error("Failed to record delivery of %s %s outbox rows: %s", len(rows), provider, e)
+
+    async def _deliver(self, provider: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Provider results in the order of ``rows``"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+        slots = asyncio.Semaphore(max(1, self.concurrency.get(provider, 1)))
+
+        async def deliver(indexes: List[int], send) -> None:
+            async with slots:
+                try:
+                    outcome = await send()
+                except Exception as e:
+                    outcome = {"status": "error", "message": str(e)}
+            if len(indexes) == 1:
+                results[indexes[0]] = outcome
+                return
+            # A combined SMS request: one result per row, in order
+            per_row = outcome.get("details", {}).get("results") or [outcome] * len(indexes)
+            for index, result in zip(indexes, per_row):
+                results[index] = result
+
+        calls = []
+        sms_groups: Dict[str, List[int]] = {}
+        for index, row in enumerate(rows):
+            payload = row["payload"]
+            if provider == "sms" and payload.get("mode") != "bulk":
+                config = payload["config"]
+                account = json.dumps([config.get(key) for key in ("ApiKey", "ClientId", "SenderId")])
+                sms_groups.setdefault(account, []).append(index)
+            else:
+                calls.append(deliver([index], self._sender(provider, payload)))
+
+        for indexes in sms_groups.values():
+            recipients = [
+                {"phone_number": rows[i]["payload"]["phone_number"], "message": rows[i]["payload"]["message"]}
+                for i in indexes
+            ]
+            config = rows[indexes[0]]["payload"]["config"]
+            calls.append(deliver(
+                indexes,
+                lambda recipients=recipients, config=config: self.sms_service.send_bulk_sms(recipients, config)
+            ))
+
+        await asyncio.gather(*calls)
+        return results
+
+    def _sender(self, provider: str, payload: Dict[str, Any]):
+        if provider == "email":
+            return lambda: self.gmail_service.send_email(config=payload["config"], form_data=payload["form_data"])
+        if provider == "slack":
+            return lambda: self.slack_service.send_message(
+                webhook_url=payload["webhook_url"],
+                channel=payload["channel"],
+                message=payload["message"]
+            )
+        if provider == "sms":
+            return lambda: self.sms_service.send_bulk_sms(payload["recipients"], payload["config"])
+        raise ValueError(f"Unknown outbox provider: {provider}")
+
+    async def _heartbeat(self, ids: List[str]) -> None:
+        """Renew the lease on a batch until cancelled"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self._execute_sql, RENEW_LEASE_SQL, {
+                    "ids": ids,
+                    "owner": self.owner,
+                    "lease_seconds": self.lease_seconds
+                })
+            except Exception as e:
+                logger.error("Failed to renew lease on %s outbox rows: %s", len(ids), e)
+
+    async def _maintain(self) -> None:
+        """Fail rows that ran out of attempts and refresh the outbox depth"""
+        while True:
+            try:
+                expired = await asyncio.to_thread(self._execute_sql, EXPIRE_SQL, {
+                    "max_attempts": self.max_attempts
+                })
+                if expired:
+                    logger.warning("Marked %s outbox rows failed after %s expired leases", expired, self.max_attempts)
+                self._depth = await asyncio.to_thread(self._fetch_scalar, PENDING_COUNT_SQL)
+            except Exception as e:
+                logger.error("Outbox maintenance failed: %s", e)
+            await asyncio.sleep(max(self.poll_interval, self.lease_seconds / 4))
+
+    def _finish(self, rows: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> None:
+        """Mark a delivered batch and its nodes in one transaction"""
+        params = []
+        for row, result in zip(rows, results):
+            sent = result.get("status") == "success"
+            params.append({
+                "id": row["id"],
+                "owner": self.owner,
+                "node_execution_id": row["node_execution_id"],
+                "status": "sent" if sent else "failed",
+                "node_status": (ExecutionStatus.COMPLETED if sent else ExecutionStatus.FAILED).value,
+                "result": json.dumps(result, default=str),
+                "error_message": None if sent else result.get("message")
+            })
+        with get_engine().begin() as connection:
+            connection.execute(FINISH_SQL, params)
+            connection.execute(NODE_RESULT_SQL, params)
+
+    def _fetch_all(self, statement, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with get_engine().begin() as connection:
+            return [dict(row) for row in connection.execute(statement, params).mappings()]
+
+    def _fetch_scalar(self, statement) -> Any:
+        with get_engine().connect() as connection:
+            return connection.execute(statement).scalar()
+
+    def _execute_sql(self, statement, params: Dict[str, Any]) -> int:
+        """Run an UPDATE in its own transaction and return the affected row count"""
+        with get_engine().begin() as connection:
+            return connection.execute(statement, params).rowcount
+
+
+outbox_dispatcher = OutboxDispatcher(
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    concurrency=settings.OUTBOX_CONCURRENCY,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    lease_seconds=settings.OUTBOX_LEASE_SECONDS,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS
+)
@@ -0,0 +1,217 @@
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+import asyncio
+import hashlib
+import logging
+import time
+import httpx
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# SMTP replies that mean "slow down / try later" rather than a bad message
+SMTP_THROTTLE_CODES = {421, 450, 451, 452, 454}
+
+# No answer in time: the provider is not keeping up, back off as for a 503
+TIMEOUT_ERRORS = (asyncio.TimeoutError, TimeoutError, httpx.TimeoutException)
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second with bursts of up to ``burst``"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.rate:
+            return
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def drain(self) -> None:
+        self.tokens = 0.0
+        self._updated = time.monotonic()
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight calls: +1 per window of successes, halved on overload"""
+
+    def __init__(self, maximum: int, minimum: int = 1):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self._changed = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._changed:
+            self.in_flight -= 1
+            self._changed.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_overload(self) -> None:
+        self.limit = max(self.minimum, self.limit / 2)
+
+
+class ProviderLimiter:
+    """Rate and concurrency limits for one provider credential"""
+
+    def __init__(self, provider: str, rate: float, burst: int, max_concurrency: int):
+        self.provider = provider
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.blocked_until = 0.0
+        self.throttled = 0
+
+    def slot(self) -> "_Slot":
+        return _Slot(self)
+
+    async def acquire(self) -> None:
+        delay = self.blocked_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self.bucket.acquire()
+        await self.concurrency.acquire()
+
+    def record(self, status_code: Optional[int], retry_after: Optional[str] = None) -> None:
+        if status_code == 429 or (status_code is not None and status_code >= 500):
+            self.throttled += 1
+            self.concurrency.on_overload()
+            delay = parse_retry_after(retry_after)
+            if delay:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+                self.bucket.drain()
+            logger.warning(
+                "%s throttled (status %s), concurrency limit now %d",
+                self.provider, status_code, int(self.concurrency.limit)
+            )
+        else:
+            self.concurrency.on_success()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "rate_per_second": self.bucket.rate,
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "throttled": self.throttled,
+            "blocked_for_seconds": max(0.0, round(self.blocked_until - time.monotonic(), 3))
+        }
+
+
+class _Slot:
+    """``async with limiter.slot() as slot``; outcomes not passed to ``slot.record`` are
+    taken from the exception raised inside the block, if any"""
+
+    def __init__(self, limiter: ProviderLimiter):
+        self.limiter = limiter
+        self._recorded = False
+
+    def record(self, status_code: Optional[int], retry_after: Optional[str] = None) -> None:
+        self._recorded = True
+        self.limiter.record(status_code, retry_after)
+
+    async def __aenter__(self) -> "_Slot":
+        await self.limiter.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        try:
+            if not self._recorded:
+                if exc is None:
+                    self.limiter.record(None)
+                else:
+                    status_code, retry_after = status_from_exception(exc)
+                    if status_code is None and isinstance(exc, TIMEOUT_ERRORS):
+                        status_code = 503
+                    # Other errors (bad credentials, invalid input) say nothing about load
+                    if status_code is not None:
+                        self.limiter.record(status_code, retry_after)
+        finally:
+            await self.limiter.concurrency.release()
+        return False
+
+
+def status_from_exception(exc: BaseException):
+    """(status code, Retry-After) from httpx, OpenAI and aiosmtplib errors.
+
+    Only statuses the provider actually answered with; a timeout has none, as
+    the request may or may not have been acted on.
+    """
+    response = getattr(exc, "response", None)
+    status_code = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if status_code is None and getattr(exc, "code", None) in SMTP_THROTTLE_CODES:
+        status_code = 429
+    headers = getattr(response, "headers", None) or {}
+    return status_code, headers.get("retry-after")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimiterRegistry:
+    """One ProviderLimiter per (provider, credential), shared by all outbound services"""
+
+    def __init__(self, max_size: int = 1024):
+        self._limiters = TTLCache(max_size=max_size)
+
+    def get(self, provider: str, credential: Optional[str] = None) -> ProviderLimiter:
+        # Credentials are hashed so API keys and passwords are not kept as keys
+        key = (provider, hashlib.sha256((credential or "").encode()).hexdigest()[:16])
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = ProviderLimiter(
+                provider,
+                rate=settings.RATE_LIMIT_PER_SECOND.get(provider, 0.0),
+                burst=settings.RATE_LIMIT_BURST.get(provider, 1),
+                max_concurrency=settings.PROVIDER_MAX_CONCURRENCY.get(provider, 8)
+            )
+            self._limiters.set(key, limiter)
+        return limiter
+
+    def limit(self, provider: str, credential: Optional[str] = None) -> _Slot:
+        return self.get(provider, credential).slot()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            f"{provider}:{credential}": self._limiters.get((provider, credential)).stats()
+            for provider, credential in self._limiters.keys()
+        }
+
+
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,208 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import asyncio
+import logging
+import random
+import time
+import aiosmtplib
+import httpx
+import openai
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import PROVIDER_CALL_DURATION
+from app.core.tracing import tracer
+from app.services.rate_limiter import status_from_exception, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errors raised before the provider could act on the request; safe to retry
+# even for operations that are not idempotent (sending an SMS or email).
+# Read and write timeouts are deliberately absent: the request may have arrived.
+NOT_DELIVERED_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+    aiosmtplib.SMTPConnectError,
+)
+# Replies that refuse the request outright
+NOT_DELIVERED_STATUS_CODES = {429, 503}
+
+# Errors that say the endpoint is struggling rather than the request being wrong
+TRANSIENT_ERRORS = (
+    httpx.TransportError,
+    asyncio.TimeoutError,
+    TimeoutError,
+    ConnectionError,
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    openai.APIConnectionError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Fails fast after ``failure_threshold`` consecutive transient failures.
+
+    After ``recovery_timeout`` seconds one probe call is let through (half-open);
+    its outcome closes the breaker or opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+
+    def before_call(self) -> None:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit breaker for {self.name} is open")
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit breaker for {self.name} is half-open, probe in flight")
+            self._probing = True
+
+    def release_probe(self) -> None:
+        self._probing = False
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("Circuit breaker for %s closed", self.name)
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Circuit breaker for %s opened after %d failures", self.name, self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        retry_in = 0.0
+        if self.state == self.OPEN:
+            retry_in = max(0.0, round(self.recovery_timeout - (time.monotonic() - self.opened_at), 3))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected_calls": self.rejected,
+            "retry_in_seconds": retry_in
+        }
+
+
+class CircuitBreakerRegistry:
+    def __init__(self, max_size: int = 1024):
+        self._breakers = TTLCache(max_size=max_size)
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                recovery_timeout=settings.CIRCUIT_RECOVERY_SECONDS
+            )
+            self._breakers.set(name, breaker)
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: self._breakers.get(name).stats() for name in self._breakers.keys()}
+
+
+circuit_breakers = CircuitBreakerRegistry()
+
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, TRANSIENT_ERRORS):
+        return True
+    if isinstance(exc, aiosmtplib.SMTPResponseException):
+        # 4xx replies are temporary by definition, 5xx are permanent rejections
+        return 400 <= exc.code < 500
+    status_code, _ = status_from_exception(exc)
+    return status_code is not None and (status_code == 429 or status_code >= 500)
+
+
+def is_retryable(exc: BaseException, idempotent: bool) -> bool:
+    if idempotent:
+        return is_transient(exc)
+    if isinstance(exc, NOT_DELIVERED_ERRORS):
+        return True
+    if isinstance(exc, aiosmtplib.SMTPResponseException):
+        # The server refused the message with a temporary reply, nothing was sent
+        return 400 <= exc.code < 500
+    status_code, _ = status_from_exception(exc)
+    return status_code in NOT_DELIVERED_STATUS_CODES
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than a server's Retry-After"""
+    ceiling = min(settings.RETRY_MAX_DELAY_SECONDS, settings.RETRY_BASE_DELAY_SECONDS * (2 ** attempt))
+    delay = random.uniform(0, ceiling)
+    return max(delay, retry_after or 0.0)
+
+
+async def call_with_resilience(
+    endpoint: str,
+    operation: Callable[[], Awaitable[T]],
+    idempotent: bool = False,
+    max_attempts: Optional[int] = None
+) -> T:
+    """Run ``operation`` behind the endpoint's circuit breaker, retrying transient failures.
+
+    Non-idempotent operations (sends) are only retried when the error shows the
+    request never reached the provider or was refused outright.
+    """
+    breaker = circuit_breakers.get(endpoint)
+    attempts = max_attempts or settings.RETRY_MAX_ATTEMPTS
+    provider = endpoint.split(":", 1)[0]
+
+    for attempt in range(attempts):
+        breaker.before_call()
+        started = time.perf_counter()
+        try:
+            with tracer.span("provider.call", endpoint=endpoint, provider=provider, attempt=attempt + 1):
+                result = await operation()
+        except asyncio.CancelledError:
+            # Neither outcome is known; free a half-open probe slot for the next caller
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            PROVIDER_CALL_DURATION.observe(time.perf_counter() - started, provider=provider, outcome="error")
+            if is_transient(e):
+                breaker.record_failure()
+            else:
+                # The endpoint answered; the request itself was wrong
+                breaker.record_success()
+
+            if attempt + 1 >= attempts or not is_retryable(e, idempotent):
+                raise
+            _, retry_after = status_from_exception(e)
+            delay = backoff_delay(attempt, parse_retry_after(retry_after))
+            logger.warning(
+                "%s call failed (%s), retry %d/%d in %.2fs",
+                endpoint, e, attempt + 1, attempts - 1, delay
+            )
+            await asyncio.sleep(delay)
+        else:
+            PROVIDER_CALL_DURATION.observe(time.perf_counter() - started, provider=provider, outcome="success")
+            breaker.record_success()
+            return result
@@ -0,0 +1,146 @@
+from typing import Dict, Any, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _DiskTier:
+    """SQLite store so cached completions survive restarts and are shared by local workers"""
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS chatgpt_responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._connection.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM chatgpt_responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float]) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO chatgpt_responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            self._connection.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM chatgpt_responses")
+            self._connection.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            deleted = self._connection.execute(
+                "DELETE FROM chatgpt_responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),)
+            ).rowcount
+            self._connection.commit()
+        return deleted
+
+
+class ResponseCache:
+    """Cache of ChatGPT completions keyed by a hash of the request.
+
+    A memory LRU sits in front of an optional SQLite tier (CHATGPT_CACHE_PATH).
+    Only nodes with ``cacheResponses`` enabled use it; hits count the tokens
+    the original completion consumed as saved.
+    """
+
+    def __init__(self, max_size: int, ttl: float, path: Optional[str] = None):
+        self.ttl = ttl
+        self._memory = TTLCache(max_size=max_size, ttl=ttl)
+        self._disk = _DiskTier(path) if path else None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "tokens_saved": 0
+        }
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], temperature: float, max_tokens: int) -> str:
+        request = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._memory.get(key)
+        if value is not None:
+            self._stats["memory_hits"] += 1
+        elif self._disk is not None:
+            value = await asyncio.to_thread(self._disk.get, key)
+            if value is not None:
+                self._stats["disk_hits"] += 1
+                self._memory.set(key, value)
+
+        if value is None:
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["hits"] += 1
+        self._stats["tokens_saved"] += value.get("usage", {}).get("total_tokens", 0)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self._memory.set(key, value, ttl=ttl)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.set, key, value, ttl)
+            except Exception as e:
+                # The memory tier still holds the response
+                logger.error("Failed to persist cached ChatGPT response: %s", e)
+
+    async def clear(self) -> None:
+        self._memory.clear()
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.clear)
+
+    async def purge_expired(self) -> int:
+        if self._disk is None:
+            return 0
+        return await asyncio.to_thread(self._disk.purge_expired)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_enabled": self._disk is not None
+        }
+
+
+response_cache = ResponseCache(
+    max_size=settings.CHATGPT_CACHE_SIZE,
+    ttl=settings.CHATGPT_CACHE_TTL_SECONDS,
+    path=settings.CHATGPT_CACHE_PATH
+)
@@ -1,6 +1,9 @@
 from typing import Optional
+from urllib.parse import urlparse
 import httpx
-from app.core.config import settings
+from app.core.http import http_clients
+from app.services.rate_limiter import rate_limiters
+from app.services.resilience import call_with_resilience, CircuitOpenError
 
 class SlackService:
     async def send_message(
@@ -19,11 +22,16 @@ class SlackService:
                 "text": message,
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(webhook_url, json=payload)
+            async def post() -> httpx.Response:
+                async with rate_limiters.limit("slack", webhook_url) as slot:
+                    response = await http_clients.get("slack").post(webhook_url, json=payload)
+                    slot.record(response.status_code, response.headers.get("retry-after"))
                 response.raise_for_status()
+                return response
+
+            await call_with_resilience(f"slack:{urlparse(webhook_url).netloc}", post)
                 
             return {"status": "success", "message": "Slack message sent successfully"}
             
-        except httpx.HTTPError as e:
+        except (httpx.HTTPError, CircuitOpenError) as e:
             return {"status": "error", "message": f"Failed to send Slack message: {str(e)}"} 
\ No newline at end of file
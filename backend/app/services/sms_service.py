@@ -1,7 +1,12 @@
-import httpx
-from typing import Dict, Any
+from typing import Dict, Any, List
 from urllib.parse import quote
+from app.core.http import http_clients
+from app.core.config import settings
+from app.services.rate_limiter import rate_limiters
+from app.services.resilience import call_with_resilience
+import asyncio
 import logging
+import re
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,46 +28,31 @@ class SMSService:
             logger.info("Preparing to send SMS to: %s", phone_number)
             
             # Clean up phone number
-            cleaned_phone = phone_number.replace("91", "", 1) if phone_number.startswith("91") else phone_number
+            cleaned_phone = self._clean_phone_number(phone_number)
             logger.info("Cleaned phone number: %s", cleaned_phone)
-            
-            # URL encode the message and phone number
-            encoded_message = quote(message)
-            encoded_phone = quote(cleaned_phone)
 
             # Construct the URL with config from node
-            url = (
-                f"{self.BASE_URL}?"
-                f"ApiKey={config['ApiKey']}&"
-                f"ClientId={config['ClientId']}&"
-                f"MobileNumbers={encoded_phone}&"
-                f"SenderId={config['SenderId']}&"
-                f"Message={encoded_message}&"
-                f"Is_Flash=false&"
-                f"Is_Unicode=false"
-            )
+            url = self._build_url([cleaned_phone], message, config)
 
             # Send the request
             logger.info("Sending HTTP request to SMS gateway...")
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                logger.info("SMS gateway response received: %s", response.text)
-
-                # Check for specific error codes in response
-                response_data = response.json()
-                if response_data.get("ErrorCode") != 0:
-                    raise Exception(f"SMS Gateway Error: {response_data.get('ErrorDescription')}")
+            response = await self._request(url, config)
+            logger.info("SMS gateway response received: %s", response.text)
+
+            # Check for specific error codes in response
+            response_data = response.json()
+            if response_data.get("ErrorCode") != 0:
+                raise Exception(f"SMS Gateway Error: {response_data.get('ErrorDescription')}")
+            
+            # Check message-level errors
+            for data in response_data.get("Data", []):
+                if data.get("MessageErrorCode") != 0:
+                    raise Exception(f"Message Error: {data.get('MessageErrorDescription')}")
                 
-                # Check message-level errors
-                for data in response_data.get("Data", []):
-                    if data.get("MessageErrorCode") != 0:
-                        raise Exception(f"Message Error: {data.get('MessageErrorDescription')}")
-                    
-                    # Log the actual mobile number used by the gateway
-                    actual_mobile = data.get("MobileNumber", "")
-                    logger.info("Gateway processed mobile number: %s", actual_mobile)
-                    logger.info("Message ID: %s", data.get("MessageId"))
+                # Log the actual mobile number used by the gateway
+                actual_mobile = data.get("MobileNumber", "")
+                logger.info("Gateway processed mobile number: %s", actual_mobile)
+                logger.info("Message ID: %s", data.get("MessageId"))
 
             logger.info("SMS sent successfully to %s", cleaned_phone)
             return {
@@ -82,6 +72,132 @@ class SMSService:
                 "message": str(e)
             }
 
+    async def send_bulk_sms(self, recipients: List[Dict[str, str]], config: Dict[str, Any]) -> Dict[str, Any]:
+        """Send many SMS with as few gateway requests as possible.
+
+        ``recipients`` holds {"phone_number", "message"} entries. Recipients that
+        share a message are sent together through the gateway's comma-separated
+        MobileNumbers, in chunks of SMS_BULK_CHUNK_SIZE, and the per-number
+        ``Data`` entries are mapped back to each recipient. Results keep the
+        order of ``recipients``.
+        """
+        try:
+            if not all(key in config for key in ['ApiKey', 'ClientId', 'SenderId']):
+                raise Exception("Missing required SMS configuration")
+
+            results: List[Dict[str, Any]] = [None] * len(recipients)
+            numbers: List[str] = []
+            by_message: Dict[str, List[int]] = {}
+            for index, recipient in enumerate(recipients):
+                phone_number = self._clean_phone_number(str(recipient.get("phone_number") or "").strip())
+                numbers.append(phone_number)
+                message = recipient.get("message") or ""
+                if not phone_number or not message:
+                    results[index] = {
+                        "to": phone_number,
+                        "status": "error",
+                        "message": "Phone number and message content are required"
+                    }
+                    continue
+                by_message.setdefault(message, []).append(index)
+
+            batches = []
+            chunk_size = max(1, settings.SMS_BULK_CHUNK_SIZE)
+            for message, indexes in by_message.items():
+                for start in range(0, len(indexes), chunk_size):
+                    batches.append((message, indexes[start:start + chunk_size]))
+
+            logger.info("Sending %d SMS in %d gateway requests", sum(len(i) for _, i in batches), len(batches))
+            slots = asyncio.Semaphore(settings.SMS_BULK_CONCURRENCY)
+
+            async def send_batch(message: str, indexes: List[int]) -> None:
+                async with slots:
+                    batch_results = await self._send_batch([numbers[i] for i in indexes], message, config)
+                for index, result in zip(indexes, batch_results):
+                    results[index] = result
+
+            await asyncio.gather(*(send_batch(message, indexes) for message, indexes in batches))
+
+            failed = sum(1 for result in results if result["status"] != "success")
+            return {
+                "status": "success" if not failed else "error",
+                "message": f"Sent {len(results) - failed} of {len(results)} SMS",
+                "details": {
+                    "requests": len(batches),
+                    "sent": len(results) - failed,
+                    "failed": failed,
+                    "results": results
+                }
+            }
+
+        except Exception as e:
+            logger.error("Failed to send bulk SMS: %s", str(e))
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+
+    async def _send_batch(self, numbers: List[str], message: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """One gateway request for several numbers; returns a result per number"""
+        try:
+            response = await self._request(self._build_url(numbers, message, config), config)
+            response_data = response.json()
+            if response_data.get("ErrorCode") != 0:
+                raise Exception(f"SMS Gateway Error: {response_data.get('ErrorDescription')}")
+        except Exception as e:
+            logger.error("SMS batch of %d failed: %s", len(numbers), str(e))
+            return [{"to": number, "status": "error", "message": str(e)} for number in numbers]
+
+        entries = response_data.get("Data") or []
+        by_number = {self._number_key(entry.get("MobileNumber", "")): entry for entry in entries}
+
+        results = []
+        for position, number in enumerate(numbers):
+            entry = by_number.get(self._number_key(number))
+            if entry is None and len(entries) == len(numbers):
+                # Fall back to request order if the gateway reformatted the numbers
+                entry = entries[position]
+            if entry is None:
+                results.append({"to": number, "status": "error", "message": "No delivery result returned by gateway"})
+            elif entry.get("MessageErrorCode") != 0:
+                results.append({"to": number, "status": "error", "message": f"Message Error: {entry.get('MessageErrorDescription')}"})
+            else:
+                results.append({"to": number, "status": "success", "messageId": entry.get("MessageId")})
+        return results
+
+    async def _request(self, url: str, config: Dict[str, Any]):
+        """Rate-limited gateway request with retries and a circuit breaker"""
+        async def send():
+            async with rate_limiters.limit("sms", config['ApiKey']) as slot:
+                response = await http_clients.get("nettyfish").get(url)
+                slot.record(response.status_code, response.headers.get("retry-after"))
+            response.raise_for_status()
+            return response
+
+        return await call_with_resilience("sms:nettyfish", send)
+
+    def _build_url(self, numbers: List[str], message: str, config: Dict[str, Any]) -> str:
+        # URL encode the message and phone numbers; the gateway splits MobileNumbers on commas
+        encoded_numbers = ",".join(quote(number) for number in numbers)
+        return (
+            f"{self.BASE_URL}?"
+            f"ApiKey={config['ApiKey']}&"
+            f"ClientId={config['ClientId']}&"
+            f"MobileNumbers={encoded_numbers}&"
+            f"SenderId={config['SenderId']}&"
+            f"Message={quote(message)}&"
+            f"Is_Flash=false&"
+            f"Is_Unicode=false"
+        )
+
+    def _clean_phone_number(self, phone_number: str) -> str:
+        return phone_number.replace("91", "", 1) if phone_number.startswith("91") else phone_number
+
+    def _number_key(self, phone_number: str) -> str:
+        """Digits only, without the country code the gateway may add back"""
+        digits = re.sub(r"\D", "", str(phone_number))
+        return digits[-10:] if len(digits) > 10 else digits
+
     # def get_message(self) -> str:
     #     """Return the exact SMS content"""
     #     message = (
@@ -0,0 +1,156 @@
+from collections import deque
+from email.message import EmailMessage
+from typing import Deque, Dict, Tuple
+import asyncio
+import logging
+import time
+import aiosmtplib
+from app.core.config import settings
+from app.services.rate_limiter import rate_limiters
+from app.services.resilience import call_with_resilience
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, int, str]
+
+
+def build_message(sender: str, recipient: str, subject: str, body: str) -> EmailMessage:
+    """Plain text message, as previously sent through fastapi-mail"""
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+class _Session:
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class _AccountPool:
+    """Sessions for one (host, port, username); the semaphore caps concurrent sessions"""
+
+    def __init__(self, max_sessions: int):
+        self.idle: Deque[_Session] = deque()
+        self.slots = asyncio.Semaphore(max_sessions)
+
+
+class SMTPPool:
+    """Authenticated SMTP sessions reused across sends and executions.
+
+    Sessions are keyed by (host, port, username) so STARTTLS and AUTH happen once
+    per session instead of once per email. Idle sessions are recycled after
+    ``idle_timeout`` seconds and after ``max_messages`` sends, since providers
+    such as Gmail drop long-lived or heavily used connections. A pooled session
+    is checked with NOOP before use; a failed send is not retried on another
+    session, as the server may already have accepted the message.
+    """
+
+    def __init__(self, max_sessions: int, idle_timeout: float, max_messages: int, timeout: float):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self._pools: Dict[SessionKey, _AccountPool] = {}
+
+    async def send(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        message: EmailMessage
+    ) -> None:
+        await call_with_resilience(
+            f"smtp:{host}:{port}",
+            lambda: self._send_once(host, port, username, password, message)
+        )
+
+    async def _send_once(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        message: EmailMessage
+    ) -> None:
+        key = (host, int(port), username)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _AccountPool(self.max_sessions)
+
+        # 421/45x replies raised by aiosmtplib count as throttling
+        async with rate_limiters.limit("smtp", f"{host}:{port}:{username}"), pool.slots:
+            session = await self._acquire(pool, key, password)
+            try:
+                await session.client.send_message(message)
+            except Exception:
+                # The message may already have been accepted, so it is never resent here
+                await self._discard(session)
+                raise
+
+            session.sent += 1
+            session.last_used = time.monotonic()
+            if session.sent >= self.max_messages:
+                await self._discard(session)
+            else:
+                pool.idle.append(session)
+
+    async def close(self) -> None:
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            while pool.idle:
+                await self._discard(pool.idle.popleft())
+
+    async def _acquire(self, pool: _AccountPool, key: SessionKey, password: str) -> _Session:
+        now = time.monotonic()
+        while pool.idle:
+            # Most recently used first, so surplus sessions age out
+            session = pool.idle.pop()
+            if now - session.last_used < self.idle_timeout and session.client.is_connected:
+                try:
+                    # The server may have dropped the session while it sat idle
+                    await session.client.noop()
+                    return session
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    logger.info("Pooled SMTP session to %s:%s dropped (%s), reconnecting", key[0], key[1], e)
+            await self._discard(session)
+        return await self._connect(key, password)
+
+    async def _connect(self, key: SessionKey, password: str) -> _Session:
+        host, port, username = key
+        # Port 465 speaks TLS from the start, other ports upgrade with STARTTLS
+        use_tls = port == 465
+        client = aiosmtplib.SMTP(
+            hostname=host,
+            port=port,
+            use_tls=use_tls,
+            start_tls=not use_tls,
+            timeout=self.timeout
+        )
+        try:
+            await client.connect()
+            await client.login(username, password)
+        except Exception:
+            client.close()
+            raise
+        logger.info("Opened SMTP session to %s:%s for %s", host, port, username)
+        return _Session(client)
+
+    async def _discard(self, session: _Session) -> None:
+        try:
+            await session.client.quit()
+        except Exception:
+            session.client.close()
+
+
+smtp_pool = SMTPPool(
+    max_sessions=settings.SMTP_MAX_SESSIONS_PER_ACCOUNT,
+    idle_timeout=settings.SMTP_IDLE_TIMEOUT_SECONDS,
+    max_messages=settings.SMTP_MAX_MESSAGES_PER_SESSION,
+    timeout=settings.SMTP_TIMEOUT_SECONDS
+)
@@ -0,0 +1,86 @@
+from typing import Any, List, Mapping, Optional, Tuple
+from functools import lru_cache
+import re
+
+# {{field}}, {{node_id.key}} and special names such as {{chatgpt}}
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([^{}]+)\}\}")
+
+_MISSING = object()
+
+
+class CompiledTemplate:
+    """A template parsed once into (literal, placeholder) segments"""
+
+    __slots__ = ("source", "segments", "names")
+
+    def __init__(self, source: str):
+        self.source = source
+        # Each segment is the literal text before a placeholder and the placeholder
+        # name, the trailing literal has no placeholder (None)
+        self.segments: List[Tuple[str, Optional[str]]] = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.segments.append((source[position:match.start()], match.group(1)))
+            position = match.end()
+        if position < len(source):
+            self.segments.append((source[position:], None))
+        self.names = tuple(name for _, name in self.segments if name is not None)
+
+    def render(
+        self,
+        data: Optional[Mapping[str, Any]] = None,
+        node_outputs: Optional[Mapping[str, Any]] = None,
+        extras: Optional[Mapping[str, Any]] = None
+    ) -> str:
+        """Render in a single pass.
+
+        Placeholders resolve against ``extras`` (e.g. {"chatgpt": ...}), then form
+        ``data``, then ``node_id.key`` lookups into ``node_outputs``. Unresolved
+        placeholders are left in the output untouched.
+        """
+        if not self.names:
+            return self.source
+
+        parts = []
+        for literal, name in self.segments:
+            parts.append(literal)
+            if name is None:
+                continue
+            value = _resolve(name, data, node_outputs, extras)
+            parts.append("{{" + name + "}}" if value is _MISSING else str(value))
+        return "".join(parts)
+
+
+def _resolve(
+    name: str,
+    data: Optional[Mapping[str, Any]],
+    node_outputs: Optional[Mapping[str, Any]],
+    extras: Optional[Mapping[str, Any]]
+) -> Any:
+    if extras and name in extras:
+        return extras[name]
+    if data and name in data:
+        return data[name]
+    if node_outputs and "." in name:
+        node_id, key = name.split(".", 1)
+        output = node_outputs.get(node_id)
+        if isinstance(output, dict) and key in output:
+            return output[key]
+    return _MISSING
+
+
+@lru_cache(maxsize=2048)
+def compile_template(template: str) -> CompiledTemplate:
+    return CompiledTemplate(template)
+
+
+def render_template(
+    template: Optional[str],
+    data: Optional[Mapping[str, Any]] = None,
+    node_outputs: Optional[Mapping[str, Any]] = None,
+    extras: Optional[Mapping[str, Any]] = None
+) -> str:
+    """Replace {{placeholders}} in a template using the cached compiled form"""
+    if not template:
+        return ""
+    return compile_template(template).render(data, node_outputs, extras)
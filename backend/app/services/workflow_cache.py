@@ -0,0 +1,68 @@
+from typing import Dict, Any, Optional
+import asyncio
+import logging
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.repository import workflows_repository
+from app.services.workflow_plan import WorkflowPlan, get_workflow_plan, invalidate_workflow_plan, workflow_revision
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowCache:
+    """LRU/TTL cache of workflow definitions and their compiled plans.
+
+    Plans are keyed by (workflow id, revision) and expire after the same TTL,
+    so a replica that missed an update compiles a fresh plan once it refetches
+    the definition. Writes through the API invalidate both locally right away.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._workflows = TTLCache(max_size=max_size, ttl=ttl)
+        self._loading: Dict[str, asyncio.Future] = {}
+
+    async def get(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        workflow = self._workflows.get(workflow_id)
+        if workflow is not None:
+            return workflow
+
+        # Concurrent misses for the same workflow share a single query
+        loading = self._loading.get(workflow_id)
+        if loading is None:
+            loading = asyncio.ensure_future(workflows_repository.get(workflow_id))
+            self._loading[workflow_id] = loading
+            try:
+                workflow = await loading
+            finally:
+                # Gone if the workflow was invalidated while loading
+                current = self._loading.get(workflow_id)
+                if current is loading:
+                    del self._loading[workflow_id]
+            if workflow and current is loading:
+                self._workflows.set(workflow_id, workflow)
+            return workflow
+
+        return await asyncio.shield(loading)
+
+    async def get_plan(self, workflow_id: str) -> Optional[WorkflowPlan]:
+        workflow = await self.get(workflow_id)
+        if not workflow:
+            return None
+        return get_workflow_plan(
+            workflow_id,
+            workflow_revision(workflow),
+            workflow.get("nodes", []),
+            workflow.get("edges", [])
+        )
+
+    def invalidate(self, workflow_id: str) -> None:
+        self._workflows.pop(workflow_id)
+        self._loading.pop(workflow_id, None)
+        invalidate_workflow_plan(workflow_id)
+        logger.info("Invalidated cached workflow %s", workflow_id)
+
+
+workflow_cache = WorkflowCache(
+    max_size=settings.WORKFLOW_CACHE_SIZE,
+    ttl=settings.WORKFLOW_CACHE_TTL_SECONDS
+)
@@ -1,24 +1,35 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
-from app.db.supabase import supabase_client
-from app.schemas.workflow import ExecutionStatus, NodeExecution
+from app.db.repository import (
+    workflow_executions_repository,
+    action_configurations_repository
+)
+from app.core.config import settings
+from app.schemas.workflow import ExecutionStatus
 from app.services.gmail_service import GmailService
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema
+from app.services.smtp_pool import smtp_pool, build_message
 from app.services.sms_service import SMSService
 from app.services.chatgpt_service import ChatGPTService
 from app.services.slack_service import SlackService
+from app.services.workflow_plan import WorkflowPlan, get_workflow_plan, workflow_revision
+from app.services.workflow_cache import workflow_cache
+from app.services.execution_journal import ExecutionJournal
+from app.services.outbox import outbox_dispatcher
+from app.core.log import ExecutionLogger, Truncated
+from app.services.execution_trace import ExecutionTrace, NULL_TRACE
+from app.core.metrics import NODE_DURATION, EXECUTIONS, EXECUTIONS_IN_FLIGHT
+from app.core.tracing import tracer
+from app.services.template_engine import render_template
+from app.services.math_expression import compile_formula
 import logging
+import asyncio
+import heapq
 import re
+import time
 import operator
 from decimal import Decimal
-from uuid import uuid4
 
-# Configure logging at the top of the file
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    force=True  # Force reconfiguration of the root logger
-)
+# Handlers are configured once by app.core.log.setup_logging
 logger = logging.getLogger(__name__)
 
 class WorkflowExecutor:
@@ -35,7 +46,13 @@ class WorkflowExecutor:
         self.sms_config = None
         self.workflow_nodes = []  # Will hold workflow nodes
         self.workflow_edges = []  # Will hold workflow edges
-        logger.info("WorkflowExecutor initialized")
+        self.plan = None  # Compiled graph indexes, see configure
+        # Buffered node_executions writes; flushed outbox rows wake the dispatcher
+        self.journal = ExecutionJournal(self.execution_id, on_flush=outbox_dispatcher.notify)
+        # Per-execution level and sampling, see app.core.log
+        self.log = ExecutionLogger(logger, self.workflow_id, self.execution_id)
+        self.trace = NULL_TRACE  # Replaced per run when DEBUG is enabled, see execute_workflow
+        self.log.debug("WorkflowExecutor initialized")
 
     async def start(self):
         try:
@@ -48,20 +65,20 @@ class WorkflowExecutor:
                 raise Exception("Workflow not found")
             self.workflow_nodes = workflow.get("nodes", [])
             self.workflow_edges = workflow.get("edges", [])
+            plan = self._get_plan(self.workflow_nodes, self.workflow_edges)
 
-            # Get starting nodes (nodes with no incoming edges)
-            start_nodes = self._get_start_nodes(workflow['nodes'], workflow['edges'])
-            
-            # Execute workflow in topological order
+            # Execute workflow in topological order starting from nodes with no incoming edges
             visited = set()
-            for node in start_nodes:
+            for node in plan.start_nodes:
                 await self._execute_node_chain(node, workflow['edges'], workflow['nodes'], visited)
 
             # Update execution status to completed
+            await self._flush_journal()
             await self._update_execution_status(ExecutionStatus.COMPLETED)
 
         except Exception as e:
             # Update execution status to failed
+            await self._flush_journal()
             await self._update_execution_status(
                 ExecutionStatus.FAILED,
                 error_message=str(e)
@@ -83,17 +100,18 @@ class WorkflowExecutor:
             self.node_outputs[node['id']] = output
 
             # Get and execute all next nodes
-            next_nodes = self._get_next_nodes(node['id'], edges, nodes)
-            for next_node in next_nodes:
+            plan = self._get_plan(nodes, edges)
+            for next_node in plan.get_next_nodes(node['id']):
                 # Check if all incoming edges' source nodes have been executed
-                incoming_edges = [edge for edge in edges if edge['target'] == next_node['id']]
-                all_dependencies_met = all(edge['source'] in visited for edge in incoming_edges)
+                all_dependencies_met = all(
+                    source_id in visited for source_id in plan.get_incoming_sources(next_node['id'])
+                )
                 
                 if all_dependencies_met:
                     await self._execute_node_chain(next_node, edges, nodes, visited)
 
         except Exception as e:
-            logger.error(f"Error executing node {node['id']}: {str(e)}")
+            self.log.error("Error executing node %s: %s", node['id'], e)
             raise e
 
     async def _execute_node(
@@ -103,13 +121,18 @@ class WorkflowExecutor:
         node_outputs: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Execute a single node with access to previous node outputs"""
+        started = time.perf_counter()
+        span = tracer.span(
+            "node.execute",
+            **{"node.id": node.get("id"), "node.type": node.get("type")}
+        ).activate()
         try:
-            logger.info(f"\n=== Executing Node ===")
-            logger.info(f"Node ID: {node.get('id')}")
-            logger.info(f"Node Type: {node.get('type')}")
-            logger.info(f"Node Data: {node.get('data')}")
-            logger.info(f"Form Data: {form_data}")
-            logger.info(f"Available Node Outputs: {node_outputs}")
+            # Payloads are only rendered when DEBUG is enabled for this execution
+            self.log.debug(
+                "Node %s (%s) data: %s, form data: %s, available outputs: %s",
+                node.get('id'), node.get('type'),
+                Truncated(node.get('data')), Truncated(form_data), Truncated(node_outputs)
+            )
 
             node_execution = await self._create_node_execution(node['id'])
             
@@ -117,7 +140,8 @@ class WorkflowExecutor:
                 node_type = node.get("type")
                 if node_type == "action":
                     app_id = node.get("data", {}).get("app", {}).get("id")
-                    logger.info(f"Executing action node with app: {app_id}")
+                    span.set_attribute("app.id", app_id)
+                    self.log.debug("Executing action node with app: %s", app_id)
 
                     if app_id == "mailConfig":
                         # Store mail config for later use
@@ -153,18 +177,15 @@ class WorkflowExecutor:
                                 if "subject" in output:
                                     chatgpt_subject = output.get("subject", "")
 
-                        # Replace ChatGPT placeholders in subject and content
-                        if chatgpt_subject and "{{chatgpt_subject}}" in subject:
-                            subject = subject.replace("{{chatgpt_subject}}", chatgpt_subject)
-                            logger.info(f"Replaced ChatGPT subject: {subject}")
+                        # ChatGPT placeholders take precedence over form field placeholders
+                        chatgpt_values = {}
+                        if chatgpt_subject:
+                            chatgpt_values["chatgpt_subject"] = chatgpt_subject
+                        if chatgpt_content:
+                            chatgpt_values["chatgpt"] = chatgpt_content
 
-                        if chatgpt_content and "{{chatgpt}}" in content:
-                            content = content.replace("{{chatgpt}}", chatgpt_content)
-                            logger.info(f"Replaced ChatGPT content: {content}")
-
-                        # Process any remaining form field placeholders
-                        subject = self._process_template(subject, form_data)
-                        content = self._process_template(content, form_data)
+                        subject = render_template(subject, form_data, node_outputs=node_outputs, extras=chatgpt_values)
+                        content = render_template(content, form_data, node_outputs=node_outputs, extras=chatgpt_values)
                         
                         if not content:
                             raise Exception("No content available to send")
@@ -177,18 +198,27 @@ class WorkflowExecutor:
                             "content": content
                         }
                         
-                        # Send email using the Gmail service
-                        result = await self.gmail_service.send_email(
-                            config=mail_config,
-                            form_data=form_data
-                        )
+                        if settings.OUTBOX_ENABLED:
+                            result = await self._record_outbox(node_execution['id'], "email", {
+                                "config": mail_config,
+                                "form_data": form_data
+                            })
+                        else:
+                            # Send email using the Gmail service
+                            result = await self.gmail_service.send_email(
+                                config=mail_config,
+                                form_data=form_data
+                            )
                         
-                        await self._update_node_execution(
-                            node_execution['id'],
-                            ExecutionStatus.COMPLETED if result["status"] == "success" else ExecutionStatus.FAILED,
-                            output_data=result
-                        )
-                        await self._emit_event("mail_completed", node, result)
+                        if result["status"] == "queued":
+                            node_status = ExecutionStatus.RUNNING
+                        elif result["status"] == "success":
+                            node_status = ExecutionStatus.COMPLETED
+                        else:
+                            node_status = ExecutionStatus.FAILED
+                        await self._update_node_execution(node_execution['id'], node_status, output_data=result)
+                        # A queued mail is only sent later by the outbox dispatcher
+                        await self._emit_event("mail_queued" if result["status"] == "queued" else "mail_completed", node, result)
                         return result
 
                     elif app_id == "chatgpt":
@@ -207,12 +237,10 @@ class WorkflowExecutor:
                             # Rest becomes content (or empty if no newlines)
                             body = lines[1].strip() if len(lines) > 1 else ""
                             
-                            # Update the result
-                            result["subject"] = subject
-                            result["content"] = body
+                            # Copy rather than update; a cached ChatGPT response may be this same dict
+                            result = {**result, "subject": subject, "content": body}
                             
-                            logger.info(f"Extracted subject: {subject}")
-                            logger.info(f"Remaining content: {body}")
+                            self.log.debug("Extracted subject: %s, remaining content: %s", Truncated(subject), Truncated(body))
                         
                         await self._update_node_execution(
                             node_execution['id'],
@@ -226,34 +254,37 @@ class WorkflowExecutor:
                         # Replace placeholders in message with node outputs and form data
                         message = config.get("message", "")
                         
-                        # First replace form data placeholders
-                        message = self.replace_placeholders(message, form_data)
-                        
-                        # Then replace node output placeholders
-                        for node_id, output in node_outputs.items():
-                            if isinstance(output, dict):
-                                # For ChatGPT output
-                                if "content" in output:
-                                    placeholder = "{{chatgpt}}"  # Special handling for chatgpt placeholder
-                                    if placeholder in message:
-                                        message = message.replace(placeholder, output["content"])
-                                # For other node outputs
-                                for key, value in output.items():
-                                    placeholder = f"{{{{{node_id}.{key}}}}}"
-                                    if placeholder in message:
-                                        message = message.replace(placeholder, str(value))
+                        # Special handling for chatgpt placeholder: first node output with content
+                        chatgpt_output = next(
+                            (output for output in node_outputs.values()
+                             if isinstance(output, dict) and "content" in output),
+                            None
+                        )
+                        chatgpt_values = {"chatgpt": chatgpt_output["content"]} if chatgpt_output else None
+
+                        # Form data, {{chatgpt}} and {{node_id.key}} placeholders in one pass
+                        message = render_template(
+                            message,
+                            form_data,
+                            node_outputs=node_outputs,
+                            extras=chatgpt_values
+                        )
                         
-                        config["message"] = message
-                        logger.info(f"Slack config after placeholder replacement: {config}")
+                        self.log.debug("Slack message after placeholder replacement: %s", Truncated(message))
                         
-                        result = await self.slack_service.send_message(
-                            webhook_url=config.get("webhook_url", ""),
-                            channel=config.get("channel", ""),
-                            message=config.get("message", "")
-                        )
+                        # Node data is shared by every execution of the plan; never write the rendered text back
+                        slack_message = {
+                            "webhook_url": config.get("webhook_url", ""),
+                            "channel": config.get("channel", ""),
+                            "message": message
+                        }
+                        if settings.OUTBOX_ENABLED:
+                            result = await self._record_outbox(node_execution['id'], "slack", slack_message)
+                        else:
+                            result = await self.slack_service.send_message(**slack_message)
                         await self._update_node_execution(
                             node_execution['id'],
-                            ExecutionStatus.COMPLETED,
+                            self._delivery_status(result),
                             output_data=result
                         )
                         return result
@@ -286,20 +317,40 @@ class WorkflowExecutor:
                         if not config:
                             raise Exception("SMS message configuration not found")
                         
-                        # Process template variables
-                        to_number = self._process_template(config.get("to", ""), form_data)
-                        message = self._process_template(config.get("message", ""), form_data)
-                        
-                        # Send SMS using the SMS service
-                        result = await self.sms_service.send_sms(
-                            phone_number=to_number,
-                            message=message,
-                            config=self.sms_config
-                        )
+                        if config.get("mode") == "bulk":
+                            recipients = self._build_sms_recipients(config, form_data)
+                            if not recipients:
+                                raise Exception("No valid phone number found")
+                            if settings.OUTBOX_ENABLED:
+                                result = await self._record_outbox(node_execution['id'], "sms", {
+                                    "mode": "bulk",
+                                    "recipients": recipients,
+                                    "config": self.sms_config
+                                })
+                            else:
+                                result = await self.sms_service.send_bulk_sms(recipients, self.sms_config)
+                        else:
+                            # Process template variables
+                            to_number = self._process_template(config.get("to", ""), form_data)
+                            message = self._process_template(config.get("message", ""), form_data)
+                            
+                            if settings.OUTBOX_ENABLED:
+                                result = await self._record_outbox(node_execution['id'], "sms", {
+                                    "phone_number": to_number,
+                                    "message": message,
+                                    "config": self.sms_config
+                                })
+                            else:
+                                # Send SMS using the SMS service
+                                result = await self.sms_service.send_sms(
+                                    phone_number=to_number,
+                                    message=message,
+                                    config=self.sms_config
+                                )
                         
                         await self._update_node_execution(
                             node_execution['id'],
-                            ExecutionStatus.COMPLETED,
+                            self._delivery_status(result),
                             output_data=result
                         )
                         return result
@@ -335,19 +386,26 @@ class WorkflowExecutor:
                 raise e
 
         except Exception as e:
-            logger.error(f"Node execution failed: {str(e)}")
+            self.log.error("Node execution failed: %s", e)
+            span.set_error(e)
             return {
                 "status": "failed",
                 "error": str(e)
             }
 
+        finally:
+            # Action nodes are timed per app (math, mail, sms, slack, chatgpt, ...)
+            node_type = node.get("type")
+            if node_type == "action":
+                node_type = node.get("data", {}).get("app", {}).get("id") or "action"
+            NODE_DURATION.observe(time.perf_counter() - started, node_type=node_type or "unknown")
+            span.end()
+
     def _get_previous_node_outputs(self, node_id: str, edges: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Get outputs from all incoming nodes"""
-        incoming_edges = [edge for edge in edges if edge['target'] == node_id]
         previous_outputs = {}
         
-        for edge in incoming_edges:
-            source_id = edge['source']
+        for source_id in self._get_plan(self.workflow_nodes, edges).get_incoming_sources(node_id):
             if source_id in self.node_outputs:
                 previous_outputs[source_id] = self.node_outputs[source_id]
         
@@ -369,25 +427,16 @@ class WorkflowExecutor:
                 content = mail_config.get('content', '')
 
                 # Check if there's a connected ChatGPT node and get its output
-                workflow = await self._get_workflow()
-                chatgpt_content = None
-                for source_node_id, output in self.node_outputs.items():
-                    source_node = next(
-                        (n for n in workflow['nodes'] 
-                         if n['id'] == source_node_id and 
-                         n.get('data', {}).get('app', {}).get('id') == 'chatgpt'),
-                        None
-                    )
-                    if source_node:
-                        chatgpt_content = output.get('content', '')
-                        break
-
-                # If content contains {{chatgpt}} placeholder and ChatGPT content exists
-                if chatgpt_content:
-                    content = content.replace('{{chatgpt}}', chatgpt_content)
-
-                # Process any remaining form field placeholders
-                content = self._process_template(content, form_data)
+                chatgpt_output = self._find_chatgpt_output(await self._load_plan())
+                chatgpt_content = chatgpt_output.get('content', '') if chatgpt_output else None
+
+                # Replace {{chatgpt}} when ChatGPT content exists, then form field placeholders
+                content = render_template(
+                    content,
+                    form_data,
+                    node_outputs=self.node_outputs,
+                    extras={'chatgpt': chatgpt_content} if chatgpt_content else None
+                )
 
                 if not content:
                     raise Exception("No content available to send")
@@ -419,26 +468,17 @@ class WorkflowExecutor:
                 message = slack_config.get('message')
 
                 # Check if there's a connected ChatGPT node and get its output
-                workflow = await self._get_workflow()
-                chatgpt_content = None
-                for source_node_id, output in self.node_outputs.items():
-                    source_node = next(
-                        (n for n in workflow['nodes'] 
-                         if n['id'] == source_node_id and 
-                         n.get('data', {}).get('app', {}).get('id') == 'chatgpt'),
-                        None
-                    )
-                    if source_node:
-                        chatgpt_content = output.get('content', '')
-                        break
+                chatgpt_output = self._find_chatgpt_output(await self._load_plan())
+                chatgpt_content = chatgpt_output.get('content', '') if chatgpt_output else None
 
                 # If message contains {{chatgpt}} placeholder or is empty and ChatGPT content exists
+                chatgpt_values = None
                 if chatgpt_content:
                     message = message or chatgpt_content  # Use message if exists, otherwise use ChatGPT content
-                    message = message.replace('{{chatgpt}}', chatgpt_content)  # Replace placeholder if exists
+                    chatgpt_values = {'chatgpt': chatgpt_content}
 
-                # Replace any form field placeholders in the message
-                message = self.replace_placeholders(message, form_data)
+                # Replace {{chatgpt}} and any form field placeholders in the message
+                message = render_template(message, form_data, node_outputs=self.node_outputs, extras=chatgpt_values)
 
                 if not message:
                     raise Exception("No message content available to send")
@@ -456,28 +496,32 @@ class WorkflowExecutor:
                 raise Exception(f"Unsupported action type: {node_type}")
 
         except Exception as e:
-            logger.error(f"Action node execution failed: {str(e)}")
+            self.log.error("Action node execution failed: %s", e)
             raise Exception(f"Action node execution failed: {str(e)}")
 
     def _get_next_nodes(self, node_id: str, edges: List[Dict[str, Any]], nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Get all nodes that should be executed after the current node"""
-        next_node_ids = [
-            edge['target']
-            for edge in edges
-            if edge['source'] == node_id
-        ]
-        return [
-            node for node in nodes
-            if node['id'] in next_node_ids
-        ]
+        return self._get_plan(nodes, edges).get_next_nodes(node_id)
 
     async def _get_workflow(self) -> Dict[str, Any]:
-        response = supabase_client.table('workflows')\
-            .select('*')\
-            .eq('id', self.workflow_id)\
-            .single()\
-            .execute()
-        return response.data
+        return await workflow_cache.get(self.workflow_id)
+
+    async def _load_plan(self) -> WorkflowPlan:
+        """Plan of the running execution, loading the workflow definition if needed"""
+        if self.plan is None:
+            workflow = await self._get_workflow()
+            if not workflow:
+                raise Exception("Workflow not found")
+            self.configure(workflow)
+        return self.plan
+
+    def _find_chatgpt_output(self, plan: WorkflowPlan, require_success: bool = False) -> Optional[Dict[str, Any]]:
+        """First output produced so far by a ChatGPT node"""
+        chatgpt_node_ids = {node['id'] for node in plan.get_nodes_by_app('chatgpt')}
+        for node_id, output in self.node_outputs.items():
+            if node_id in chatgpt_node_ids and (not require_success or output.get('status') == 'success'):
+                return output
+        return None
 
     async def _execute_form_node(self, node: Dict[str, Any]) -> Dict[str, Any]:
         # For now, just pass through the form data from trigger
@@ -486,12 +530,8 @@ class WorkflowExecutor:
     async def _execute_email_action(self, node: Dict[str, Any]) -> Dict[str, Any]:
         try:
             # First find the mail config node
-            workflow = await self._get_workflow()
-            mail_config_node = next(
-                (node for node in workflow['nodes'] 
-                 if node.get('data', {}).get('app', {}).get('id') == 'mailConfig'),
-                None
-            )
+            plan = await self._load_plan()
+            mail_config_node = next(iter(plan.get_nodes_by_app('mailConfig')), None)
             
             if not mail_config_node:
                 raise Exception("Mail configuration not found. Please add a Mail Config node.")
@@ -506,73 +546,55 @@ class WorkflowExecutor:
             form_data = self.execution.get('trigger_data', {}).get('data', {})
 
             # Find connected ChatGPT node output
-            chatgpt_content = None
-            for source_node_id, output in self.node_outputs.items():
-                source_node = next(
-                    (n for n in workflow['nodes'] 
-                     if n['id'] == source_node_id and 
-                     n.get('data', {}).get('app', {}).get('id') == 'chatgpt'),
-                    None
-                )
-                if source_node and output.get('status') == 'success':
-                    chatgpt_content = output.get('content')
-                    break
+            chatgpt_output = self._find_chatgpt_output(plan, require_success=True)
+            chatgpt_content = chatgpt_output.get('content') if chatgpt_output else None
+
+            # node_config belongs to the cached plan; render into a local instead
+            content = node_config.get('content', 'Form submitted')
 
             # If content is empty and ChatGPT content is available, use it
             if not node_config.get('content') and chatgpt_content:
-                node_config['content'] = chatgpt_content
+                content = chatgpt_content
             elif '{{chatgpt}}' in node_config.get('content', ''):
                 # Replace {{chatgpt}} placeholder with generated content
-                node_config['content'] = node_config['content'].replace('{{chatgpt}}', chatgpt_content or '')
-
-            # Create mail configuration using node settings
-            mail_conf = ConnectionConfig(
-                MAIL_USERNAME=mail_settings['username'],
-                MAIL_PASSWORD=mail_settings['password'],
-                MAIL_FROM=mail_settings['username'],
-                MAIL_PORT=int(mail_settings['port']),
-                MAIL_SERVER=mail_settings['host'],
-                MAIL_STARTTLS=True,
-                MAIL_SSL_TLS=False,
-                USE_CREDENTIALS=True
-            )
-
-            # Create FastMail instance with dynamic config
-            fastmail = FastMail(mail_conf)
+                content = render_template(
+                    node_config['content'],
+                    extras={'chatgpt': chatgpt_content or ''}
+                )
 
             # Prepare email data
             email_config = {
                 "from": mail_settings['username'],
                 "to": node_config.get('to', ''),
                 "subject": node_config.get('subject', 'Workflow Notification'),
-                "body": node_config.get('content', 'Form submitted')
+                "body": content
             }
 
             if not email_config['to']:
                 raise Exception("No recipient email address found")
 
             # Process templates for all fields
-            for field_name, field_value in form_data.items():
-                placeholder = f"{{{{{field_name}}}}}"
-                for key in ['to', 'subject', 'body']:
-                    if placeholder in email_config[key]:
-                        email_config[key] = email_config[key].replace(placeholder, str(field_value))
+            for key in ['to', 'subject', 'body']:
+                email_config[key] = render_template(email_config[key], form_data, node_outputs=self.node_outputs)
 
             # Validate email address after placeholder replacement
             if not '@' in email_config['to']:
                 raise Exception(f"Invalid email address: {email_config['to']}")
 
-            # Create message
-            message = MessageSchema(
-                subject=email_config['subject'],
-                recipients=[email_config['to']],
-                body=email_config['body'],
-                subtype="plain"
+            # Send over a pooled, already authenticated session for this account
+            await smtp_pool.send(
+                host=mail_settings['host'],
+                port=int(mail_settings['port']),
+                username=mail_settings['username'],
+                password=mail_settings['password'],
+                message=build_message(
+                    email_config['from'],
+                    email_config['to'],
+                    email_config['subject'],
+                    email_config['body']
+                )
             )
 
-            # Send email
-            await fastmail.send_message(message)
-
             return {
                 "status": "success",
                 "message": "Email sent successfully",
@@ -589,29 +611,33 @@ class WorkflowExecutor:
 
     async def _execute_sms_action(self, node: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            logger.info("Starting SMS action execution for node: %s", node.get('id'))
+            self.log.debug("Starting SMS action execution for node: %s", node.get('id'))
             
             # First find the SMS config node
-            workflow = await self._get_workflow()
-            sms_config_node = next(
-                (node for node in workflow['nodes'] 
-                 if node.get('data', {}).get('app', {}).get('id') == 'smsConfig'),
-                None
-            )
+            plan = await self._load_plan()
+            sms_config_node = next(iter(plan.get_nodes_by_app('smsConfig')), None)
             
             if not sms_config_node:
-                logger.error("SMS configuration node not found")
+                self.log.error("SMS configuration node not found")
                 raise Exception("SMS configuration not found. Please add an SMS Config node.")
 
             # Get SMS config settings
             sms_settings = sms_config_node.get('data', {}).get('config', {}).get('smsConfig', {})
             if not all([sms_settings.get(key) for key in ['ApiKey', 'ClientId', 'SenderId']]):
-                logger.error("Incomplete SMS configuration")
+                self.log.error("Incomplete SMS configuration")
                 raise Exception("Incomplete SMS configuration. Please check SMS Config node settings.")
 
             # Get the node's configuration and form data
             node_config = node.get('data', {}).get('config', {}).get('smsMessage', {})
             form_data = self.execution.get('trigger_data', {}).get('data', {})
+
+            if node_config.get('mode') == 'bulk':
+                recipients = self._build_sms_recipients(node_config, form_data)
+                if not recipients:
+                    raise Exception("No valid phone number found")
+                result = await self.sms_service.send_bulk_sms(recipients, sms_settings)
+                self.log.info("Bulk SMS action completed: %s", result.get('message'))
+                return result
             
             # Get phone number from form data if it contains a placeholder
             phone_number = node_config.get('to', '')
@@ -623,16 +649,12 @@ class WorkflowExecutor:
                 raise Exception("No valid phone number found")
 
             # Get message content and process any placeholders
-            message = node_config.get('message', '')
-            for field_name, field_value in form_data.items():
-                placeholder = f"{{{{{field_name}}}}}"
-                if placeholder in message:
-                    message = message.replace(placeholder, str(field_value))
+            message = render_template(node_config.get('message', ''), form_data, node_outputs=self.node_outputs)
             
             if not message:
                 raise Exception("No message content found")
             
-            logger.info("Sending SMS to: %s", phone_number)
+            self.log.debug("Sending SMS to: %s", phone_number)
 
             # Send SMS with dynamic message and config
             result = await self.sms_service.send_sms(
@@ -640,14 +662,44 @@ class WorkflowExecutor:
                 message,
                 sms_settings
             )
-            logger.info("SMS action completed with result: %s", result)
+            self.log.debug("SMS action completed with result: %s", Truncated(result))
 
             return result
 
         except Exception as e:
-            logger.error("SMS action failed: %s", str(e))
+            self.log.error("SMS action failed: %s", e)
             raise Exception(f"SMS action failed: {str(e)}")
 
+    def _build_sms_recipients(self, config: Dict[str, Any], form_data: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Recipients of an SMS node in bulk mode.
+
+        ``recipients`` lists {"to", "data"} entries whose data fills the message
+        template on top of the form data. Without it, ``to`` holds several numbers
+        (separated by commas or whitespace, or a form field holding a list) that
+        all get the same message.
+        """
+        template = config.get('message', '')
+        entries = config.get('recipients')
+        if entries:
+            recipients = []
+            for entry in entries:
+                data = {**form_data, **(entry.get('data') or {})}
+                recipients.append({
+                    "phone_number": render_template(str(entry.get('to', '')), data, node_outputs=self.node_outputs),
+                    "message": render_template(template, data, node_outputs=self.node_outputs)
+                })
+            return recipients
+
+        to = config.get('to', '').strip()
+        field_value = form_data.get(to.strip('{}')) if to.startswith('{{') else None
+        if isinstance(field_value, list):
+            numbers = [str(number) for number in field_value]
+        else:
+            numbers = re.split(r'[,;\s]+', render_template(to, form_data, node_outputs=self.node_outputs))
+
+        message = render_template(template, form_data, node_outputs=self.node_outputs)
+        return [{"phone_number": number, "message": message} for number in numbers if number]
+
     async def _execute_mail_config_action(self, node: Dict[str, Any]) -> Dict[str, Any]:
         try:
             config = node.get('data', {}).get('config', {})
@@ -667,7 +719,7 @@ class WorkflowExecutor:
     async def _execute_sms_config_action(self, node: Dict[str, Any]) -> Dict[str, Any]:
         """Execute SMS configuration action"""
         try:
-            logger.info("Processing SMS configuration for node: %s", node.get('id'))
+            self.log.debug("Processing SMS configuration for node: %s", node.get('id'))
             
             # Get the SMS configuration from the node
             sms_config = node.get('data', {}).get('config', {}).get('smsConfig', {})
@@ -685,7 +737,7 @@ class WorkflowExecutor:
             return config_output
 
         except Exception as e:
-            logger.error("SMS config action failed: %s", str(e))
+            self.log.error("SMS config action failed: %s", e)
             raise Exception(f"SMS config action failed: {str(e)}")
 
     async def _execute_math_action(self, node: Dict[str, Any]) -> Dict[str, Any]:
@@ -700,12 +752,11 @@ class WorkflowExecutor:
             output_variable = config.get('outputVariable', 'result')
             include_details = config.get('includeDetails', False)
             
-            print("\n" + "="*50)
-            print(f"Math Function Execution")
-            print("="*50)
-            print(f"Operation Type: {operation}")
-            print(f"Output Variable: {output_variable}")
-            print("-"*50)
+            # NULL_TRACE is falsy, so untraced executions skip building the events
+            trace = self.trace
+            node_id = node.get('id')
+            if trace:
+                trace.event(node_id, "math.start", operation=operation, output_variable=output_variable)
 
             def get_value(input_str: str, default: str = '0') -> float:
                 if not input_str:
@@ -715,12 +766,14 @@ class WorkflowExecutor:
                     value = form_data.get(field_name)
                     if value is None:
                         raise ValueError(f"Field {field_name} not found in form data")
-                    print(f"Field value for {field_name}: {value}")
+                    if trace:
+                        trace.event(node_id, "math.input", field=field_name, value=value)
                     try:
                         return float(value)
                     except (ValueError, TypeError):
                         raise ValueError(f"Field '{field_name}' value '{value}' cannot be converted to number")
-                print(f"Direct value: {input_str}")
+                if trace:
+                    trace.event(node_id, "math.input", value=input_str)
                 return float(input_str)
 
             # Handle custom formula operation
@@ -729,42 +782,22 @@ class WorkflowExecutor:
                 if not formula:
                     raise ValueError("Custom formula is empty")
 
-                print("Custom Formula Calculation:")
-                print(f"Original Formula: {formula}")
-                
-                processed_formula = formula
-                for field_name, field_value in form_data.items():
-                    placeholder = f'{{{{{field_name}}}}}'
-                    if placeholder in processed_formula:
-                        try:
-                            numeric_value = float(field_value)
-                            processed_formula = processed_formula.replace(placeholder, str(numeric_value))
-                        except (ValueError, TypeError):
-                            raise ValueError(f"Field '{field_name}' value '{field_value}' cannot be converted to number")
-
-                print(f"Processed Formula: {processed_formula}")
-                
-                if not re.match(r'^[\d\s\+\-\*\/\(\)\.]+$', processed_formula):
-                    raise ValueError("Invalid characters in formula")
-
-                result = float(eval(processed_formula))
+                # Parsed once per distinct formula, then evaluated against the form data
+                compiled = compile_formula(formula)
+                values = compiled.bind(form_data)
+                result = float(compiled.compute(values))
                 details = {
                     "formula": formula,
-                    "processed_formula": processed_formula,
+                    "processed_formula": compiled.render(values),
+                    "variables": values,
                     "result": result
                 }
-                print(f"Result: {result}")
 
             # Handle basic operations
             elif operation in ['add', 'subtract', 'multiply', 'divide', 'power']:
                 value1 = get_value(inputs.get('value1', '0'))
                 value2 = get_value(inputs.get('value2', '0'))
                 
-                print("Basic Operation Calculation:")
-                print(f"Value 1: {value1}")
-                print(f"Value 2: {value2}")
-                print(f"Operation: {operation}")
-                
                 ops = {
                     'add': operator.add,
                     'subtract': operator.sub,
@@ -780,17 +813,12 @@ class WorkflowExecutor:
                     'operation': operation,
                     'result': result
                 }
-                print(f"Result: {result}")
 
             # Handle GST calculation
             elif operation == 'gst':
                 value1 = get_value(inputs.get('value1', '0'))
                 rate = float(inputs.get('taxRate', '0'))
                 
-                print("GST Calculation:")
-                print(f"Base Amount: {value1}")
-                print(f"GST Rate: {rate}%")
-                
                 tax_amount = (value1 * rate) / 100
                 result = value1 + tax_amount
                 details = {
@@ -799,18 +827,12 @@ class WorkflowExecutor:
                     'tax_amount': tax_amount,
                     'total': result
                 }
-                print(f"GST Amount: {tax_amount}")
-                print(f"Total (with GST): {result}")
 
             # Handle discount calculation
             elif operation == 'discount':
                 value = get_value(inputs.get('value1', '0'))
                 rate = float(inputs.get('discountRate', '0'))
                 
-                print("Discount Calculation:")
-                print(f"Original Amount: {value}")
-                print(f"Discount Rate: {rate}%")
-                
                 discount_amount = (value * rate) / 100
                 result = value - discount_amount
                 details = {
@@ -819,19 +841,19 @@ class WorkflowExecutor:
                     'discount_amount': discount_amount,
                     'final_amount': result
                 }
-                print(f"Discount Amount: {discount_amount}")
-                print(f"Final Amount (after discount): {result}")
+
+            if trace:
+                # The per-operation details carry the intermediate values the prints used to show
+                trace.event(node_id, "math.computed", **details)
 
             # Round the result if specified
             round_decimals = config.get('roundDecimals')
             if round_decimals is not None:
                 result = round(result, int(round_decimals))
-                logger.info(f"Rounded to {round_decimals} decimal places: {result}")
+                if trace:
+                    trace.event(node_id, "math.rounded", decimals=round_decimals, result=result)
 
-            print("-"*50)
-            logger.info(f"Final Output: {result}")
-            logger.info(f"Stored in variable: {output_variable}")
-            print("="*50 + "\n")
+            self.log.debug("Math output %s stored in variable: %s", result, output_variable)
 
             return {
                 "status": "success",
@@ -841,7 +863,9 @@ class WorkflowExecutor:
             }
 
         except Exception as e:
-            print(f"Math operation failed: {str(e)}")
+            self.log.warning("Math operation failed: %s", e)
+            if self.trace:
+                self.trace.event(node.get('id'), "math.failed", error=str(e))
             return {
                 "status": "error",
                 "message": f"Math operation failed: {str(e)}"
@@ -870,26 +894,10 @@ class WorkflowExecutor:
     async def _create_node_execution(self, node_id: str) -> Dict[str, Any]:
         """Create a node execution record"""
         try:
-            execution_data = {
-                "id": str(uuid4()),
-                "workflow_execution_id": self.execution_id,
-                "node_id": node_id,
-                "status": ExecutionStatus.RUNNING,
-                "started_at": datetime.utcnow().isoformat()
-            }
-            
-            # Remove await since supabase_client is synchronous
-            response = supabase_client.table("node_executions")\
-            .insert(execution_data)\
-            .execute()
-            
-            if not response.data:
-                raise Exception("Failed to create node execution record")
-            
-            return response.data[0]
+            return await self.journal.record_start(node_id)
         
         except Exception as e:
-            logger.error(f"Failed to create node execution: {str(e)}")
+            self.log.error("Failed to create node execution: %s", e)
             raise e
 
     async def _update_node_execution(
@@ -901,33 +909,43 @@ class WorkflowExecutor:
     ) -> None:
         """Update a node execution record"""
         try:
-            update_data = {
-                "status": status,
-                "completed_at": datetime.utcnow().isoformat()
-            }
-            
-            if output_data is not None:
-                update_data["output_data"] = output_data
-            if error_message is not None:
-                update_data["error_message"] = error_message
-
-            # Remove await since supabase_client is synchronous
-            response = supabase_client.table("node_executions")\
-            .update(update_data)\
-                .eq("id", execution_id)\
-            .execute()
-            
-            if not response.data:
-                raise Exception("Failed to update node execution record")
+            await self.journal.record_finish(
+                execution_id,
+                status,
+                output_data=output_data,
+                error_message=error_message
+            )
             
         except Exception as e:
-            logger.error(f"Failed to update node execution: {str(e)}")
+            self.log.error("Failed to update node execution: %s", e)
             raise e
 
+    async def _record_outbox(self, node_execution_id: str, provider: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a provider call; the outbox dispatcher sends it once the journal is flushed"""
+        outbox_id = await self.journal.record_outbox(node_execution_id, provider, payload)
+        return {
+            "status": "queued",
+            "message": f"Queued for {provider} delivery",
+            "outbox_id": outbox_id
+        }
+
+    @staticmethod
+    def _delivery_status(result: Dict[str, Any]) -> ExecutionStatus:
+        """Node status for a provider result; queued messages are completed by the outbox dispatcher"""
+        return ExecutionStatus.RUNNING if result.get("status") == "queued" else ExecutionStatus.COMPLETED
+
+    async def _flush_journal(self) -> None:
+        """Persist buffered node executions; never masks the execution outcome"""
+        try:
+            await self.journal.flush()
+        except Exception as e:
+            self.log.error("Failed to persist node executions: %s", e)
+
     async def _update_execution_status(
         self,
         status: ExecutionStatus,
-        error_message: str = None
+        error_message: str = None,
+        trace: Dict[str, Any] = None
     ):
         update_data = {
             "status": status,
@@ -935,30 +953,27 @@ class WorkflowExecutor:
         }
         if error_message:
             update_data["error_message"] = error_message
+        if trace is not None:
+            update_data["trace"] = trace
 
-        supabase_client.table('workflow_executions')\
-            .update(update_data)\
-            .eq('id', self.execution_id)\
-            .execute()
+        await workflow_executions_repository.update(self.execution_id, update_data)
 
     def _get_start_nodes(
         self,
         nodes: List[Dict[str, Any]],
         edges: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        target_nodes = set(edge['target'] for edge in edges)
-        return [node for node in nodes if node['id'] not in target_nodes]
+        return self._get_plan(nodes, edges).start_nodes
 
-    def _get_action_config(self, node_id: str) -> Dict[str, Any] | None:
+    async def _get_action_config(self, node_id: str) -> Dict[str, Any] | None:
         try:
-            response = supabase_client.table('action_configurations')\
-                .select('*')\
-                .eq('workflow_id', self.workflow_id)\
-                .eq('node_id', node_id)\
-                .execute()
+            configs = await action_configurations_repository.find(
+                workflow_id=self.workflow_id,
+                node_id=node_id
+            )
             
-            if response.data and len(response.data) > 0:
-                return response.data[0]
+            if configs:
+                return configs[0]
             return None
         
         except Exception:
@@ -966,7 +981,7 @@ class WorkflowExecutor:
 
     async def _execute_chatgpt_action(self, node: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            logger.info("Starting ChatGPT action execution for node: %s", node.get('id'))
+            self.log.debug("Starting ChatGPT action execution for node: %s", node.get('id'))
             
             # Get the node's configuration
             chatgpt_config = node.get('data', {}).get('config', {}).get('chatgptConfig', {})
@@ -984,253 +999,355 @@ class WorkflowExecutor:
                 form_data=form_data
             )
 
-            logger.info("ChatGPT action completed with result: %s", result)
+            self.log.debug("ChatGPT action completed with result: %s", Truncated(result))
             return result
 
         except Exception as e:
-            logger.error("ChatGPT action failed: %s", str(e))
+            self.log.error("ChatGPT action failed: %s", e)
             raise Exception(f"ChatGPT action failed: {str(e)}")
 
     def replace_placeholders(self, message: str, form_data: dict) -> str:
-        for field_name, field_value in form_data.items():
-            placeholder = f"{{{{{field_name}}}}}"
-            message = message.replace(placeholder, str(field_value))
-        return message
+        return render_template(message, form_data, node_outputs=self.node_outputs)
+
+    def configure(self, workflow: Dict[str, Any]) -> None:
+        """Apply the workflow's log level and use the plan of its current revision"""
+        self.log.configure(workflow)
+        self.plan = get_workflow_plan(
+            self.workflow_id,
+            workflow_revision(workflow),
+            workflow.get("nodes", []),
+            workflow.get("edges", [])
+        )
+
+    async def run(self, workflow: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute this execution and persist its final status"""
+        self.configure(workflow)
+        if self.execution.get("status") != ExecutionStatus.RUNNING:
+            await self._update_execution_status(ExecutionStatus.RUNNING)
+
+        result = await self.execute_workflow(
+            nodes=workflow["nodes"],
+            edges=workflow["edges"],
+            trigger_data=self.execution.get("trigger_data", {}),
+            # Optional per-workflow overrides of the scheduler settings
+            mode=workflow.get("execution_mode"),
+            max_concurrency=workflow.get("max_concurrency")
+        )
+
+        if result["status"] == "completed":
+            await self._update_execution_status(ExecutionStatus.COMPLETED, trace=result.get("trace"))
+        else:
+            await self._update_execution_status(
+                ExecutionStatus.FAILED,
+                error_message=result.get("error"),
+                trace=result.get("trace")
+            )
+        return result
 
     async def execute_workflow(
         self,
         nodes: List[Dict[str, Any]],
         edges: List[Dict[str, Any]],
-        trigger_data: Dict[str, Any]
+        trigger_data: Dict[str, Any],
+        mode: Optional[str] = None,
+        max_concurrency: Optional[int] = None
     ) -> Dict[str, Any]:
-        try:
-            logger.info("\n=== Starting Workflow Execution ===")
-            logger.info(f"Raw trigger data: {trigger_data}")
+        """Execute the workflow from its form trigger.
+
+        ``mode`` selects the scheduler: "sequential" follows one edge at a time,
+        "concurrent" runs every node whose dependencies are resolved at once,
+        capped at ``max_concurrency`` in-flight nodes. Both default to settings.
+        When DEBUG is enabled for the execution, its trace is returned under "trace".
+        """
+        self.trace = ExecutionTrace() if self.log.isEnabledFor(logging.DEBUG) else NULL_TRACE
+        EXECUTIONS_IN_FLIGHT.inc()
+        with tracer.start_trace(
+            self.execution_id,
+            "workflow.execute",
+            **{"workflow.id": self.workflow_id, "execution.id": self.execution_id}
+        ) as span:
+            try:
+                self.log.info("Starting workflow execution")
+                self.log.debug("Trigger data: %s", Truncated(trigger_data))
             
-            form_submission_data = trigger_data.get('data', {})
-            logger.info(f"Extracted form data: {form_submission_data}")
-
-            self.node_outputs = {}
-            execution_results = {}
-            processed_nodes = set()
-            processed_edges = set()
-            skipped_nodes = set()  # Track nodes that were skipped due to conditions
-
-            trigger_node = next(
-                (node for node in nodes if node["type"] == "form"),
-                None
-            )
+                form_submission_data = trigger_data.get('data', {})
+
+                self.node_outputs = {}
+                execution_results = {}
+
+                plan = self._get_plan(nodes, edges)
+                trigger_node = plan.trigger_node
             
-            if not trigger_node:
-                logger.error("No trigger node found in workflow")
-                raise ValueError("No trigger node found in workflow")
+                if not trigger_node:
+                    self.log.error("No trigger node found in workflow")
+                    raise ValueError("No trigger node found in workflow")
 
-            logger.info(f"Found trigger node: {trigger_node['id']}")
+                self.log.debug("Found trigger node: %s", trigger_node['id'])
             
-            processed_nodes.add(trigger_node["id"])
-            self.node_outputs[trigger_node["id"]] = form_submission_data
-            execution_results[trigger_node["id"]] = {
-                "status": "completed",
-                "data": form_submission_data
-            }
+                self.node_outputs[trigger_node["id"]] = form_submission_data
+                execution_results[trigger_node["id"]] = {
+                    "status": "completed",
+                    "data": form_submission_data
+                }
 
-            while True:
-                next_edge = self._find_next_valid_edge(edges, processed_nodes, processed_edges)
-                if not next_edge:
-                    logger.info("No more valid edges to process")
-                    break
-
-                edge_id = next_edge.get("id")
-                if edge_id in processed_edges:
-                    logger.warning(f"Edge {edge_id} already processed, skipping to prevent loop")
-                    continue
-
-                logger.info(f"\nProcessing edge: {next_edge}")
-                source_node_id = next_edge["source"]
-                target_node_id = next_edge["target"]
-
-                # Skip if source node was skipped due to conditions
-                if source_node_id in skipped_nodes:
-                    logger.info(f"Skipping node {target_node_id} - parent node {source_node_id} was skipped")
-                    skipped_nodes.add(target_node_id)  # Also skip this node
-                    processed_nodes.add(target_node_id)
-                    processed_edges.add(edge_id)
-                    execution_results[target_node_id] = {
-                        "status": "skipped",
-                        "reason": "Parent node was skipped"
-                    }
-                    continue
-
-                # Validate target node exists
-                target_node = next((node for node in nodes if node["id"] == target_node_id), None)
-                if not target_node:
-                    logger.warning(f"Target node {target_node_id} not found, skipping edge")
-                    processed_edges.add(edge_id)
-                    continue
-                
-                # Evaluate edge conditions
-                conditions_met = self._evaluate_edge_conditions(next_edge, form_submission_data)
-                logger.info(f"Conditions evaluation result for node {target_node_id}: {conditions_met}")
-
-                if not conditions_met:
-                    logger.info(f"Skipping node {target_node_id} - conditions not met")
-                    skipped_nodes.add(target_node_id)  # Add to skipped nodes
-                    processed_nodes.add(target_node_id)
-                    processed_edges.add(edge_id)
-                    execution_results[target_node_id] = {
-                        "status": "skipped",
-                        "reason": "Conditions not met"
-                    }
-                    continue
-
-                # Execute node with access to previous node outputs
-                logger.info(f"Executing node: {target_node_id}")
-                result = await self._execute_node(target_node, form_submission_data, self.node_outputs)
-                execution_results[target_node_id] = result
-                self.node_outputs[target_node_id] = result
-                processed_nodes.add(target_node_id)
-                processed_edges.add(edge_id)
-
-            logger.info("\n=== Workflow Execution Completed ===")
-            return {
-                "status": "completed",
-                "results": execution_results,
-                "executed_at": datetime.utcnow().isoformat()
-            }
+                if self._resolve_execution_mode(plan, mode) == "concurrent":
+                    await self._run_concurrent(plan, form_submission_data, execution_results, max_concurrency)
+                else:
+                    await self._run_sequential(plan, form_submission_data, execution_results)
 
-        except Exception as e:
-            logger.error(f"Workflow execution failed: {str(e)}")
-            return {
-                "status": "failed",
-                "error": str(e),
-                "executed_at": datetime.utcnow().isoformat()
-            }
+                self.log.info("Workflow execution completed")
+                result = {
+                    "status": "completed",
+                    "results": execution_results,
+                    "executed_at": datetime.utcnow().isoformat()
+                }
 
-    def _find_next_valid_edge(
-        self,
-        edges: List[Dict[str, Any]],
-        processed_nodes: set,
-        processed_edges: set
-    ) -> Dict[str, Any]:
-        """Find the next valid edge where source is processed but target isn't"""
-        for edge in edges:
-            edge_id = edge.get("id")
-            if (edge_id not in processed_edges and
-                edge["source"] in processed_nodes and 
-                edge["target"] not in processed_nodes):
-                return edge
-        return None
+            except Exception as e:
+                self.log.error("Workflow execution failed: %s", e)
+                span.set_error(e)
+                result = {
+                    "status": "failed",
+                    "error": str(e),
+                    "executed_at": datetime.utcnow().isoformat()
+                }
 
-    def _evaluate_edge_conditions(
-        self,
-        edge: Dict[str, Any],
-        form_data: Dict[str, Any]
-    ) -> bool:
-        """Evaluate conditions on an edge"""
-        try:
-            logger.info("\n=== Starting Edge Condition Evaluation ===")
-            logger.info(f"Edge: {edge['source']} -> {edge['target']}")
-            logger.info(f"Form data: {form_data}")
-            
-            conditions = edge.get("data", {}).get("conditions", [])
-            logger.info(f"Conditions to evaluate: {conditions}")
-            
-            if not conditions:
-                logger.info("No conditions found - executing node by default")
-                return True
-
-            for condition in conditions:
-                # Remove {{ }} and any extra spaces
-                field = condition["field"].strip("{}").strip()
-                operator = condition["operator"]
-                expected_value = str(condition["value"]).strip()
-                actual_value = str(form_data.get(field, "")).strip()
-                
-                logger.info(f"\nEvaluating condition:")
-                logger.info(f"Field: '{field}'")
-                logger.info(f"Operator: '{operator}'")
-                logger.info(f"Expected value: '{expected_value}'")
-                logger.info(f"Actual value: '{actual_value}'")
+            finally:
+                # Node state is buffered during the run and written in bulk here
+                await self._flush_journal()
+                EXECUTIONS_IN_FLIGHT.dec()
 
-                result = self._check_condition(actual_value, operator, expected_value)
-                logger.info(f"Condition result: {result}")
+        EXECUTIONS.inc(status=result["status"])
 
-                if not result:
-                    logger.info("Condition failed - skipping node execution")
-                    return False
+        if self.trace:
+            result["trace"] = self.trace.export()
+        return result
 
-            logger.info("All conditions passed")
-            return True
+    async def _run_sequential(
+        self,
+        plan: WorkflowPlan,
+        form_submission_data: Dict[str, Any],
+        execution_results: Dict[str, Any]
+    ) -> None:
+        """Follow one edge at a time, always taking the earliest eligible edge"""
+        trigger_id = plan.trigger_node["id"]
+        edges = plan.edges
+        processed_nodes = {trigger_id}
+        processed_edges = set()
+        skipped_nodes = set()  # Track nodes that were skipped due to conditions
+
+        # Candidate edges keyed by their position so the earliest eligible edge is always taken next
+        pending_edges = list(plan.outgoing.get(trigger_id, []))
+        heapq.heapify(pending_edges)
+
+        while True:
+            edge_index = self._pop_next_valid_edge(plan, pending_edges, processed_nodes, processed_edges)
+            if edge_index is None:
+                self.log.debug("No more valid edges to process")
+                break
+
+            next_edge = edges[edge_index]
+            self.log.debug("Processing edge %s -> %s", next_edge["source"], next_edge["target"])
+            source_node_id = next_edge["source"]
+            target_node_id = next_edge["target"]
+
+            # Skip if source node was skipped due to conditions
+            if source_node_id in skipped_nodes:
+                self.log.info("Skipping node %s - parent node %s was skipped", target_node_id, source_node_id)
+                skipped_nodes.add(target_node_id)  # Also skip this node
+                self._mark_processed(plan, target_node_id, processed_nodes, pending_edges)
+                processed_edges.add(edge_index)
+                execution_results[target_node_id] = {
+                    "status": "skipped",
+                    "reason": "Parent node was skipped"
+                }
+                continue
+
+            # Validate target node exists
+            target_node = plan.get_node(target_node_id)
+            if not target_node:
+                self.log.warning("Target node %s not found, skipping edge", target_node_id)
+                processed_edges.add(edge_index)
+                continue
+
+            # Evaluate edge conditions
+            conditions_met = self._evaluate_edge_conditions(plan, edge_index, form_submission_data)
+
+            if not conditions_met:
+                self.log.info("Skipping node %s - conditions not met", target_node_id)
+                skipped_nodes.add(target_node_id)  # Add to skipped nodes
+                self._mark_processed(plan, target_node_id, processed_nodes, pending_edges)
+                processed_edges.add(edge_index)
+                execution_results[target_node_id] = {
+                    "status": "skipped",
+                    "reason": "Conditions not met"
+                }
+                continue
 
-        except Exception as e:
-            logger.error(f"Error evaluating conditions: {str(e)}")
-            return False
+            # Execute node with access to previous node outputs
+            self.log.info("Executing node: %s", target_node_id)
+            result = await self._execute_node(target_node, form_submission_data, self.node_outputs)
+            execution_results[target_node_id] = result
+            self.node_outputs[target_node_id] = result
+            self._mark_processed(plan, target_node_id, processed_nodes, pending_edges)
+            processed_edges.add(edge_index)
 
-    def _check_condition(
+    async def _run_concurrent(
         self,
-        actual_value: str,
-        operator: str,
-        expected_value: str
-    ) -> bool:
-        """Check a single condition"""
-        try:
-            logger.info(f"Checking: '{actual_value}' {operator} '{expected_value}'")
-
-            # Ensure we're comparing strings
-            actual_value = str(actual_value).strip()
-            expected_value = str(expected_value).strip()
-
-            if operator == "Equal to":
-                return actual_value == expected_value
-            elif operator == "Not equal to":
-                return actual_value != expected_value
-            elif operator == "Contains":
-                return expected_value in actual_value
-            elif operator == "Does not contain":
-                return expected_value not in actual_value
-            elif operator == "Starts with":
-                return actual_value.startswith(expected_value)
-            elif operator == "Ends with":
-                return actual_value.endswith(expected_value)
+        plan: WorkflowPlan,
+        form_submission_data: Dict[str, Any],
+        execution_results: Dict[str, Any],
+        max_concurrency: Optional[int] = None
+    ) -> None:
+        """Run every node whose parents are resolved at the same time.
+
+        A node waits for all of its parents that are reachable from the trigger.
+        It runs if at least one executed parent's edge passes its conditions,
+        otherwise it is skipped with the same reasons as the sequential mode.
+        Mail and SMS nodes also wait for the config nodes they read settings
+        from (see WorkflowPlan.get_config_sources), without an edge between them.
+        """
+        trigger_id = plan.trigger_node["id"]
+        reachable = plan.reachable_from(trigger_id)
+        limit = max_concurrency or settings.WORKFLOW_MAX_CONCURRENCY
+        semaphore = asyncio.Semaphore(max(1, int(limit)))
+
+        # Number of unresolved reachable parents and config nodes per node
+        waiting = {
+            node_id: sum(1 for source_id in plan.get_incoming_sources(node_id) if source_id in reachable)
+            for node_id in reachable
+        }
+        config_dependents: Dict[str, List[str]] = {}
+        for node_id in reachable:
+            for config_id in plan.get_config_sources(node_id):
+                if config_id in reachable:
+                    config_dependents.setdefault(config_id, []).append(node_id)
+                    waiting[node_id] += 1
+        skipped_nodes = set()
+        running = set()
+
+        async def run_node(node: Dict[str, Any]) -> str:
+            async with semaphore:
+                self.log.info("Executing node: %s", node['id'])
+                result = await self._execute_node(node, form_submission_data, self.node_outputs)
+            execution_results[node['id']] = result
+            self.node_outputs[node['id']] = result
+            return node['id']
+
+        def resolve(node_id: str) -> None:
+            """Release the children and config dependents of a node that has finished or been skipped"""
+            for edge_index in plan.outgoing.get(node_id, []):
+                release(plan.edges[edge_index]["target"])
+            for target_id in config_dependents.get(node_id, []):
+                release(target_id)
+
+        def release(target_id: str) -> None:
+            if target_id not in waiting:
+                return
+            waiting[target_id] -= 1
+            if waiting[target_id] == 0:
+                schedule(target_id)
+
+        def schedule(node_id: str) -> None:
+            node = plan.get_node(node_id)
+            if not node:
+                self.log.warning("Target node %s not found, skipping", node_id)
+                return
+
+            live_edges = [
+                index for index in plan.incoming.get(node_id, [])
+                if plan.edges[index]["source"] in reachable and plan.edges[index]["source"] not in skipped_nodes
+            ]
+            if not live_edges:
+                reason = "Parent node was skipped"
+            elif any(self._evaluate_edge_conditions(plan, index, form_submission_data) for index in live_edges):
+                running.add(asyncio.create_task(run_node(node)))
+                return
             else:
-                logger.warning(f"Unknown operator: {operator}")
-                return False
+                reason = "Conditions not met"
 
-        except Exception as e:
-            logger.error(f"Error in condition check: {str(e)}")
-            return False
+            self.log.info("Skipping node %s - %s", node_id, reason)
+            skipped_nodes.add(node_id)
+            execution_results[node_id] = {"status": "skipped", "reason": reason}
+            resolve(node_id)
 
-    def _process_template(self, template: str, data: Dict[str, Any]) -> str:
-        """Replace {{field}} placeholders with actual values from form data"""
-        if not template:
-            return ""
-            
-        result = template
-        for key, value in data.items():
-            placeholder = f"{{{{{key}}}}}"
-            if placeholder in result:
-                result = result.replace(placeholder, str(value))
+        resolve(trigger_id)
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    running.discard(task)
+                    resolve(task.result())
+        finally:
+            for task in running:
+                task.cancel()
+
+    def _resolve_execution_mode(self, plan: WorkflowPlan, mode: Optional[str]) -> str:
+        mode = (mode or settings.WORKFLOW_EXECUTION_MODE).lower()
+        if mode == "concurrent" and plan.has_cycle:
+            self.log.warning("Workflow graph has a cycle, falling back to sequential execution")
+            return "sequential"
+        return mode
+
+    def _get_plan(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> WorkflowPlan:
+        """Get the compiled plan set by ``configure``, or compile an uncached one from ``nodes``"""
+        if self.plan is None:
+            self.plan = get_workflow_plan(self.workflow_id, None, nodes, edges)
+        return self.plan
+
+    def _mark_processed(
+        self,
+        plan: WorkflowPlan,
+        node_id: str,
+        processed_nodes: set,
+        pending_edges: List[int]
+    ) -> None:
+        """Mark a node as processed and queue its outgoing edges as candidates"""
+        processed_nodes.add(node_id)
+        for edge_index in plan.outgoing.get(node_id, []):
+            heapq.heappush(pending_edges, edge_index)
+
+    def _pop_next_valid_edge(
+        self,
+        plan: WorkflowPlan,
+        pending_edges: List[int],
+        processed_nodes: set,
+        processed_edges: set
+    ) -> int | None:
+        """Pop the next valid edge where source is processed but target isn't"""
+        while pending_edges:
+            edge_index = heapq.heappop(pending_edges)
+            if (edge_index not in processed_edges and
+                plan.edges[edge_index]["target"] not in processed_nodes):
+                return edge_index
+        return None
+
+    def _evaluate_edge_conditions(
+        self,
+        plan: WorkflowPlan,
+        edge_index: int,
+        form_data: Dict[str, Any]
+    ) -> bool:
+        """Evaluate the compiled conditions of an edge"""
+        edge = plan.edges[edge_index]
+        result = plan.get_edge_predicate(edge_index)(form_data)
+        self.log.debug("Edge %s -> %s conditions met: %s", edge['source'], edge['target'], result)
         return result
 
     def _process_template(self, template: str, data: Dict[str, Any]) -> str:
-        """Replace {{field}} placeholders with actual values from form data"""
-        if not template:
-            return ""
-            
-        result = template
-        for key, value in data.items():
-            placeholder = f"{{{{{key}}}}}"
-            if placeholder in result:
-                result = result.replace(placeholder, str(value))
-        return result 
+        """Replace {{field}} and {{node_id.key}} placeholders with form data and node outputs"""
+        return render_template(template, data, node_outputs=self.node_outputs)
 
     async def _emit_event(self, event_type: str, source_node: Dict[str, Any], result: Any):
-        logger.info(f"Emitting event '{event_type}' for node {source_node.get('id')}")
-        for edge in self.workflow_edges:
+        self.log.debug("Emitting event '%s' for node %s", event_type, source_node.get('id'))
+        if not self.workflow_edges:
+            # Event edges are only wired up when the workflow was loaded through start()
+            return
+        plan = self._get_plan(self.workflow_nodes, self.workflow_edges)
+        for edge_index in plan.outgoing.get(source_node.get('id'), []):
+            edge = plan.edges[edge_index]
             # Check if the edge is triggered by the event from the source node.
-            if edge.get('source') == source_node.get('id') and edge.get('data', {}).get('triggerEvent') == event_type:
-                target_node = next((n for n in self.workflow_nodes if n.get('id') == edge['target']), None)
+            if edge.get('data', {}).get('triggerEvent') == event_type:
+                target_node = plan.get_node(edge['target'])
                 if target_node:
-                    logger.info(f"Triggering node {target_node.get('id')} due to event '{event_type}'")
-                    import asyncio
-                    asyncio.create_task(self._execute_node_chain(target_node, self.workflow_edges, self.workflow_nodes, visited=set())) 
\ No newline at end of file
+                    self.log.info("Triggering node %s due to event '%s'", target_node.get('id'), event_type)
+                    asyncio.create_task(self._execute_node_chain(target_node, plan.edges, plan.nodes, visited=set()))
\ No newline at end of file
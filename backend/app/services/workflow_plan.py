@@ -0,0 +1,149 @@
+from typing import Dict, Any, List, Optional, Set, Tuple
+from collections import deque
+import logging
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.conditions import Predicate, compile_edge_predicate
+
+logger = logging.getLogger(__name__)
+
+# Action apps that read settings another node publishes on the executor at run
+# time rather than through an edge: app id -> app id of the config node
+CONFIG_SOURCES = {"mail": "mailConfig", "sms": "smsConfig"}
+
+
+class WorkflowPlan:
+    """Pre-indexed view of a workflow graph, built once per workflow revision"""
+
+    def __init__(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
+        self.nodes = nodes
+        self.edges = edges
+        self.nodes_by_id: Dict[str, Dict[str, Any]] = {}
+        self.nodes_by_app: Dict[str, List[Dict[str, Any]]] = {}
+        # Edge indexes hold positions into self.edges so edge order is preserved
+        self.outgoing: Dict[str, List[int]] = {}
+        self.incoming: Dict[str, List[int]] = {}
+
+        for node in nodes:
+            self.nodes_by_id[node['id']] = node
+            app_id = (node.get('data') or {}).get('app', {}).get('id')
+            if app_id:
+                self.nodes_by_app.setdefault(app_id, []).append(node)
+
+        for index, edge in enumerate(edges):
+            self.outgoing.setdefault(edge['source'], []).append(index)
+            self.incoming.setdefault(edge['target'], []).append(index)
+
+        self.trigger_node = next((node for node in nodes if node.get('type') == 'form'), None)
+        self.start_nodes = [node for node in nodes if node['id'] not in self.incoming]
+        self.topological_order, self.has_cycle = self._topological_sort()
+        self._reachable: Dict[str, Set[str]] = {}
+        self._config_sources: Dict[str, List[str]] = {}
+        self._edge_predicates: Dict[int, Predicate] = {}
+
+    def _topological_sort(self) -> Tuple[List[str], bool]:
+        """Kahn's algorithm; nodes caught in a cycle are left out of the order"""
+        in_degree = {node_id: 0 for node_id in self.nodes_by_id}
+        for edge in self.edges:
+            if edge['target'] in in_degree:
+                in_degree[edge['target']] += 1
+
+        ready = deque(node_id for node_id, degree in in_degree.items() if degree == 0)
+        order = []
+        while ready:
+            node_id = ready.popleft()
+            order.append(node_id)
+            for index in self.outgoing.get(node_id, []):
+                target = self.edges[index]['target']
+                if target in in_degree:
+                    in_degree[target] -= 1
+                    if in_degree[target] == 0:
+                        ready.append(target)
+
+        return order, len(order) != len(in_degree)
+
+    def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        return self.nodes_by_id.get(node_id)
+
+    def get_nodes_by_app(self, app_id: str) -> List[Dict[str, Any]]:
+        return self.nodes_by_app.get(app_id, [])
+
+    def get_next_nodes(self, node_id: str) -> List[Dict[str, Any]]:
+        """Targets of the outgoing edges of a node, in node definition order"""
+        target_ids = {self.edges[index]['target'] for index in self.outgoing.get(node_id, [])}
+        return [node for node in self.nodes if node['id'] in target_ids]
+
+    def get_incoming_sources(self, node_id: str) -> List[str]:
+        return [self.edges[index]['source'] for index in self.incoming.get(node_id, [])]
+
+    def get_edge_predicate(self, edge_index: int) -> Predicate:
+        """Compiled conditions of an edge, built the first time the edge is evaluated"""
+        predicate = self._edge_predicates.get(edge_index)
+        if predicate is None:
+            predicate = compile_edge_predicate(self.edges[edge_index])
+            self._edge_predicates[edge_index] = predicate
+        return predicate
+
+    def get_config_sources(self, node_id: str) -> List[str]:
+        """Config nodes whose settings this node reads, other than ones that can only run after it"""
+        if node_id not in self._config_sources:
+            node = self.nodes_by_id.get(node_id) or {}
+            config_app = CONFIG_SOURCES.get((node.get('data') or {}).get('app', {}).get('id'))
+            downstream = self.reachable_from(node_id) if config_app else set()
+            self._config_sources[node_id] = [
+                config_node['id'] for config_node in self.get_nodes_by_app(config_app)
+                if config_node['id'] not in downstream
+            ] if config_app else []
+        return self._config_sources[node_id]
+
+    def reachable_from(self, node_id: str) -> Set[str]:
+        """Ids of every node reachable from node_id, including itself"""
+        if node_id not in self._reachable:
+            seen = {node_id}
+            stack = [node_id]
+            while stack:
+                for index in self.outgoing.get(stack.pop(), []):
+                    target = self.edges[index]['target']
+                    if target not in seen:
+                        seen.add(target)
+                        stack.append(target)
+            self._reachable[node_id] = seen
+        return self._reachable[node_id]
+
+
+# Keyed by (workflow id, revision). Replicas only see their own invalidations,
+# so plans also expire with the definitions they were compiled from.
+_plan_cache = TTLCache(max_size=settings.WORKFLOW_CACHE_SIZE, ttl=settings.WORKFLOW_CACHE_TTL_SECONDS)
+
+
+def workflow_revision(workflow: Dict[str, Any]) -> Tuple[Any, Any]:
+    """Changes whenever the definition is saved; every API write sets updated_at"""
+    return workflow.get("version", 1), workflow.get("updated_at")
+
+
+def get_workflow_plan(
+    workflow_id: Optional[str],
+    revision: Any,
+    nodes: List[Dict[str, Any]],
+    edges: List[Dict[str, Any]]
+) -> WorkflowPlan:
+    """Return the compiled plan for a workflow revision, building it on first use.
+
+    Without a workflow id or revision the plan is compiled but not cached.
+    """
+    if workflow_id is None or revision is None:
+        return WorkflowPlan(nodes, edges)
+
+    key = (workflow_id, revision)
+    plan = _plan_cache.get(key)
+    if plan is None:
+        plan = WorkflowPlan(nodes, edges)
+        _plan_cache.set(key, plan)
+        logger.info("Compiled execution plan for workflow %s (revision %s)", workflow_id, revision)
+    return plan
+
+
+def invalidate_workflow_plan(workflow_id: str) -> None:
+    for key in _plan_cache.keys():
+        if key[0] == workflow_id:
+            _plan_cache.pop(key)
@@ -0,0 +1,18 @@
+-- Lease columns that let workflow_executions act as a durable work queue
+-- (EXECUTION_QUEUE_BACKEND=postgres). Workers claim PENDING rows with
+-- FOR UPDATE SKIP LOCKED and keep them leased with heartbeats; a RUNNING row
+-- whose lease expired is reclaimed by another worker.
+
+ALTER TABLE workflow_executions
+    ADD COLUMN IF NOT EXISTS lease_owner TEXT,
+    ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS workflow_executions_pending_idx
+    ON workflow_executions (started_at)
+    WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS workflow_executions_lease_idx
+    ON workflow_executions (lease_expires_at)
+    WHERE status = 'running' AND lease_expires_at IS NOT NULL;
@@ -0,0 +1,16 @@
+-- Idempotency keys for POST /workflows/{id}/execute. A row is inserted when a
+-- request claims its key and completed with the response it returned; repeated
+-- requests replay that response until expires_at.
+
+CREATE TABLE IF NOT EXISTS execution_idempotency (
+    id TEXT PRIMARY KEY,
+    workflow_id TEXT NOT NULL,
+    execution_id TEXT,
+    status_code INTEGER,
+    response JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS execution_idempotency_expires_at_idx
+    ON execution_idempotency (expires_at);
@@ -0,0 +1,28 @@
+-- Transactional outbox (OUTBOX_ENABLED). Email, SMS and Slack nodes record the
+-- message to send here, flushed with the node_executions batch, instead of
+-- calling the provider inline. Dispatchers claim pending rows per provider with
+-- FOR UPDATE SKIP LOCKED; a 'sending' row whose lease expired is claimed again.
+
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    workflow_execution_id TEXT NOT NULL,
+    node_execution_id TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires_at TIMESTAMPTZ,
+    result JSONB,
+    error_message TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    completed_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS outbox_pending_idx
+    ON outbox (provider, created_at)
+    WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS outbox_lease_idx
+    ON outbox (provider, lease_expires_at)
+    WHERE status = 'sending';
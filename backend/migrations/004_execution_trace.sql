@@ -0,0 +1,6 @@
+-- Structured debug trace of an execution (math node inputs and intermediate
+-- values, ...). Only written for executions logged at DEBUG: workflows listed
+-- in WORKFLOW_LOG_LEVELS, workflows with log_level set, and sampled executions.
+
+ALTER TABLE workflow_executions
+    ADD COLUMN IF NOT EXISTS trace JSONB;
@@ -0,0 +1,37 @@
+-- Base tables as they exist in the Supabase project, enough for the
+-- migrations in ../../migrations to apply to an empty local Postgres.
+
+CREATE TABLE IF NOT EXISTS workflows (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    name TEXT NOT NULL,
+    nodes JSONB NOT NULL DEFAULT '[]',
+    edges JSONB NOT NULL DEFAULT '[]',
+    is_active BOOLEAN NOT NULL DEFAULT true,
+    version INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS workflow_executions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    workflow_id UUID NOT NULL REFERENCES workflows (id) ON DELETE CASCADE,
+    workflow_version INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL,
+    trigger_type TEXT NOT NULL,
+    trigger_data JSONB NOT NULL DEFAULT '{}',
+    started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    completed_at TIMESTAMPTZ,
+    error_message TEXT
+);
+
+CREATE TABLE IF NOT EXISTS node_executions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    workflow_execution_id UUID NOT NULL REFERENCES workflow_executions (id) ON DELETE CASCADE,
+    node_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    completed_at TIMESTAMPTZ,
+    input_data JSONB,
+    output_data JSONB,
+    error_message TEXT
+);